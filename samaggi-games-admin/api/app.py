@@ -1,36 +1,76 @@
 import csv
 import datetime
-import json
+import os
+import threading
 import uuid
-from decimal import Decimal
+from concurrent.futures import Future
 from typing import Dict, Any, List
-import boto3
 import time
-from DynamoDBInterface import DynamoDB
-from APIGatewayInterface.Arguments import Arguments
-from APIGatewayInterface import Tests
-from support import DepArguments, university_names, university_names_simplified, university_city, simplify_university
-import urllib
-from discordwebhook import Discord
-
-
-db: DynamoDB.Database = DynamoDB.Database()
-
-WEBHOOK_URL = "https://discord.com/api/webhooks/1308091282350018610/1J5OMeZEPEVZpcTSW5HDF8K3eAkwXoPKaW5EX6JOlmK9EUqsiCSdG-sdb_ZE3JXnZB1Y"
-
-
-# Adapted from Elias Zamaria's answer on Stack Overflow, dated: 7th Oct 2010, accessed 21st Dec 2021.
-# Available at: https://stackoverflow.com/questions/1960516/python-json-serialize-a-decimal-object
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, Decimal):
-            return float(o)
-        return super(DecimalEncoder, self).default(o)
+from university_registry import universities
+from scanner import ParallelScanner
+from live_statistics import StatisticsStore, StatisticsAggregate
+from batch_writer import BatchWriter, UpdateWriter, TransactionWriter, serialize
+from query_cache import QueryCache
+from aws_clients import dynamodb_client, s3_client, tune_default_session
+from presign_cache import image_links
+from pagination import projection, scan_page, encode_token, decode_token, page_limit
+from responses import respond
+from request_schema import Schema, optional, nullable, NUMBER
+from query_planner import plan, execute, check_filters
+from instrumentation import instrumented, phase, attach_default_session
+from roster_keys import TEAM_SPORT, PLAYER_SPORT, UNIVERSITY_SPORT, Rosters, composite, with_keys, stale_keys, \
+    key_parts, ensure_indexes, migration_marker, MIGRATION_TABLE
+
+
+class LazyDatabase:
+    """Stands in for `DynamoDB.Database()` until a handler first calls `table`, so importing this module (and the
+    cold start of handlers that never use the helper library) does not load it or open connections."""
+
+    def __init__(self):
+        self._database = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._database is None:
+                from DynamoDBInterface import DynamoDB
+                tune_default_session()
+                attach_default_session()
+                self._database = DynamoDB.Database()
+        return self._database
+
+    def table(self, name: str):
+        return (self._database or self._load()).table(name)
+
+
+# DYNAMODB_BACKEND=memory runs every handler against local_dynamodb instead of AWS, e.g. for benchmarks.
+if os.environ.get("DYNAMODB_BACKEND") == "memory":
+    from local_dynamodb import install
+    db = install()
+else:
+    db = LazyDatabase()
+
+PAYMENT_CODES_TABLE = "SamaggiGamesPaymentCodes"
+MAX_PAYMENT_CODE_ATTEMPTS = 5
+TEAM_ID_NAMESPACE = uuid.UUID("5d0c7c5e-8a4f-4b8e-9a59-3f6f1d2a7c11")
+
+WEBHOOK_URL = os.environ.get(
+    "DISCORD_WEBHOOK_URL",
+    "https://discord.com/api/webhooks/1308091282350018610/1J5OMeZEPEVZpcTSW5HDF8K3eAkwXoPKaW5EX6JOlmK9EUqsiCSdG-sdb_ZE3JXnZB1Y"
+)
+
+# Built by the first send_discord call; only disqualify_teams reports to Discord.
+discord_notifier = None
+# Seconds of the Lambda timeout kept back from Discord delivery so the handler can still return its report.
+RETURN_MARGIN = 1.0
 
 
 class DynamoDBQueryResponse(list):
 
     def __init__(self, dictionary):
+        # key -> {value: [rows]}, built on first use and shared by every lookup on that key. Every list mutation
+        # below drops them; rows changed in place must be followed by `_changed()`, as `where_eq` does.
+        self._indexes: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {}
         if "Items" not in dictionary:
             self.is_empty = True
             super().__init__([])
@@ -38,15 +78,86 @@ class DynamoDBQueryResponse(list):
             self.is_empty = False
             super().__init__(dictionary["Items"])
 
+    def _changed(self):
+        self._indexes.clear()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self._changed()
+        return result
+
+    def __imul__(self, count):
+        result = super().__imul__(count)
+        self._changed()
+        return result
+
+    def append(self, item):
+        super().append(item)
+        self._changed()
+
+    def extend(self, items):
+        super().extend(items)
+        self._changed()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._changed()
+
+    def remove(self, item):
+        super().remove(item)
+        self._changed()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+    def index_on(self, key: str) -> Dict[Any, List[Dict[str, Any]]]:
+        if key not in self._indexes:
+            index = {}
+            for result in self:
+                index.setdefault(result[key], []).append(result)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def _candidates(self, conditions: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if not conditions:
+            return self
+        key, value = next(iter(conditions.items()))
+        try:
+            return self.index_on(key).get(value, [])
+        except TypeError:  # unhashable values (lists, maps) cannot be indexed
+            return self
+
     def query(self, query_parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
         query_result = []
-        for result in self:
+        for result in self._candidates(query_parameters):
             if all(result[key] == value for key, value in query_parameters.items()):
                 query_result.append(result)
         return query_result
 
     def item_exists_where(self, conditions: Dict[str, Any]) -> bool:
-        for result in self:
+        for result in self._candidates(conditions):
             if all(result[key] == value for key, value in conditions.items()):
                 return True
         return False
@@ -59,6 +170,8 @@ class DynamoDBQueryResponse(list):
         }
         if eval_as is not None and eval_as not in valid_types.keys():
             raise ValueError("Invalid evaluation type.")
+        if eval_as is not None:
+            self._changed()
         query_result = []
         for result in self:
             if eval_as is not None:
@@ -69,29 +182,37 @@ class DynamoDBQueryResponse(list):
         return query_result
 
     def first_item_where(self, conditions: Dict[str, Any], raise_if_not_found: bool = True) -> Dict[str, Any]:
-        for result in self:
+        for result in self._candidates(conditions):
             if all(result[key] == value for key, value in conditions.items()):
                 return result
         if raise_if_not_found:
             raise ValueError("No item matches conditions")
 
+    def group_by(self, key: str) -> Dict[Any, List[Dict[str, Any]]]:
+        return self.index_on(key)
+
+    def count_by(self, key: str) -> Dict[Any, int]:
+        return {value: len(results) for value, results in self.index_on(key).items()}
+
+    def count_distinct(self, key: str) -> int:
+        return len(self.index_on(key))
+
     def unique_values_for_key(self, key: str):
-        unique_values = []
-        for result in self:
-            if result[key] not in unique_values:
-                unique_values.append(result[key])
-        return unique_values
+        return list(self.index_on(key).keys())
 
+    def unique_values_for_keys(self, keys: List[str]) -> Dict[str, List[Any]]:
+        unseen = [key for key in keys if key not in self._indexes]
+        if unseen:
+            indexes = {key: {} for key in unseen}
+            for result in self:
+                for key in unseen:
+                    indexes[key].setdefault(result[key], []).append(result)
+            self._indexes.update(indexes)
+        return {key: list(self._indexes[key].keys()) for key in keys}
 
-def cors(data: Dict[str, Any]):
-    data["headers"] = {
-        'Access-Control-Allow-Headers': 'Content-Type,authorisation',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Methods': '*'
-    }
-    return data
 
 #excluded athletic from sports type
+@instrumented
 def get_sports(_, __):
     excluded_sports = [
         "100M Sprint Female", "100M Sprint Male", "200M Sprint Female", "200M Sprint Male",
@@ -101,17 +222,20 @@ def get_sports(_, __):
     sports_list = list(x["sport_name"] for x in db.table("SamaggiGamesSportCount").scan().all())
     filtered_sports = [sport for sport in sports_list if sport not in excluded_sports]
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Sports Retrieved.",
-            "sports": filtered_sports
-        })
+    return respond(200, {
+        "message": "Sports Retrieved.",
+        "sports": filtered_sports
     })
 
 
+CHECK_CODE_ARGUMENTS = Schema(code=str)
+
+
+@instrumented
 def check_code(event, __):
-    arguments = DepArguments(event)
+    arguments, error = CHECK_CODE_ARGUMENTS.parse(event)
+    if error:
+        return error
     code = arguments["code"].lower().replace(" ", "")
 
     # if time.time() < 1700917200:
@@ -148,33 +272,36 @@ def check_code(event, __):
         city = address_data["city"]
         postcode = address_data["postcode"]
 
-    if code in university_names_simplified:
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "Signed In",
-                "valid": True,
-                "name": university_names[university_names_simplified.index(code)],
-                "addr-name": address_name,
-                "addr1": address1,
-                "addr2": address2,
-                "city": city,
-                "postcode": postcode
-            })
+    if code in universities:
+        return respond(200, {
+            "message": "Signed In",
+            "valid": True,
+            "name": universities.name(code),
+            "addr-name": address_name,
+            "addr1": address1,
+            "addr2": address2,
+            "city": city,
+            "postcode": postcode
         })
     else:
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "University not found. Check your code and try again.",
-                "valid": False,
-                "name": ""
-            })
+        return respond(200, {
+            "message": "University not found. Check your code and try again.",
+            "valid": False,
+            "name": ""
         })
 
 
+SAVE_ADDRESS_ARGUMENTS = Schema(
+    code=str, addrName=nullable(str), addr1=nullable(str), addr2=nullable(str), city=nullable(str),
+    postcode=nullable(str)
+)
+
+
+@instrumented
 def save_address(event, _):
-    arguments = DepArguments(event)
+    arguments, error = SAVE_ADDRESS_ARGUMENTS.parse(event)
+    if error:
+        return error
 
     db.table("SamaggiGamesAddress").write({
         "code": arguments["code"],
@@ -185,115 +312,131 @@ def save_address(event, _):
         "postcode": arguments["postcode"]
     })
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Saved Successfully"
-        })
+    return respond(200, {
+        "message": "Saved Successfully"
     })
 
 
-def team_exists(event, _):
-    try:
-        arguments = DepArguments(event)
-        team_university = arguments["player_university"]
-        sport = arguments["sport"]
-    except Exception as e:
-        return cors({
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "There was an issue getting required parameters.",
-                "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-            })
-        })
+TEAM_EXISTS_ARGUMENTS = Schema(player_university=str, sport=str)
 
-    team_data = db.table("SamaggiGamesTeams").get(
-        "university", equals=team_university,
-        is_secondary_index=True
-    )
-    # unique_universities = set(team["university"] for team in team_data.all() if team["sport"] == sport)
 
-    if any(team["sport"] == sport for team in team_data.all()):
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "Success",
-                "exist": True
-            })
-        })
+@instrumented
+def team_exists(event, _):
+    arguments, error = TEAM_EXISTS_ARGUMENTS.parse(event)
+    if error:
+        return error
+    team_university = arguments["player_university"]
+    sport = arguments["sport"]
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
+    team_data = Rosters(QueryCache()).get("SamaggiGamesTeams", UNIVERSITY_SPORT, team_university, sport)
+
+    if team_data.exists():
+        return respond(200, {
             "message": "Success",
-            "exist": False
+            "exist": True
         })
+
+    return respond(200, {
+        "message": "Success",
+        "exist": False
     })
 
 
-def data_statistics(_, __):
+@instrumented
+def data_statistics(event, __):
+    # ?raw=false opts into the statistics alone; everything else keeps the full response with raw_data. The stored
+    # statistics are only current while UpdateStatistics consumes the streams, which the template says through
+    # STATISTICS_STREAMS; without it, or before RebuildStatistics has built them, they come from the full scan.
+    summary_only = ((event or {}).get("queryStringParameters") or {}).get("raw") == "false"
+
+    if summary_only and os.environ.get("STATISTICS_STREAMS") == "on":
+        try:
+            with phase("read"):
+                statistics = StatisticsStore().load()
+        except Exception:
+            statistics = None
+
+        if statistics is not None:
+            return respond(200, {
+                "data": statistics.to_response()
+            })
+
     try:
-        dynamodb = boto3.resource("dynamodb")
-        player_table = dynamodb.Table("SamaggiGamesPlayers")
-        team_table = dynamodb.Table("SamaggiGamesTeams")
-        sport_count_table = dynamodb.Table("SamaggiGamesSportCount")
+        scanner = ParallelScanner()
     except Exception as e:
-        return cors({
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Unable to initialise one or more tables.",
-                "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-            })
+        return respond(500, {
+            "message": "Unable to initialise one or more tables.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
         })
 
+    # Pages are counted as they arrive from any table. Rows are only kept for raw_data, and SportCount rows are
+    # already held by the aggregate.
+    aggregate = StatisticsAggregate()
+    rows = {"SamaggiGamesPlayers": [], "SamaggiGamesTeams": []}
     try:
-        player_data_query = DynamoDBQueryResponse(player_table.scan())
-        teams_data_query = DynamoDBQueryResponse(team_table.scan())
-        sport_data_query = DynamoDBQueryResponse(sport_count_table.scan())
+        with phase("read"):
+            for table, page in scanner.table_pages("SamaggiGamesPlayers", "SamaggiGamesTeams",
+                                                   "SamaggiGamesSportCount"):
+                aggregate.add_rows(table, page)
+                if not summary_only and table in rows:
+                    rows[table].extend(page)
     except Exception as e:
-        return cors({
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Unable to scan tables.",
-                "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-            })
+        return respond(500, {
+            "message": "Unable to scan tables.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
         })
 
     try:
-        response = {
-            "unique_main_universities": teams_data_query.unique_values_for_key("team_university"),
-            "unique_player_universities": teams_data_query.unique_values_for_key("university"),
-            "unique_players": player_data_query.unique_values_for_key("name"),
-            "full_teams": sport_data_query.where_eq("max_teams", "team_count", eval_as="NUMBER")
-        }
-
-        response["num_unique_main_universities"] = len(response["unique_main_universities"])
-        response["num_unique_player_universities"] = len(response["unique_player_universities"])
-        response["num_unique_player"] = len(response["unique_players"])
+        response = aggregate.to_response()
     except Exception as e:
-        return cors({
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Unable to parse query results.",
-                "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-            })
+        return respond(500, {
+            "message": "Unable to parse query results.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
         })
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "data": response,
-            "raw_data": {
-                "sport_count": sport_data_query,
-                "players": player_data_query,
-                "teams": teams_data_query
-            }
-        }, cls=DecimalEncoder)
-    })
+    if summary_only:
+        return respond(200, {
+            "data": response
+        })
 
+    return respond(200, {
+        "data": response,
+        "raw_data": {
+            "sport_count": list(aggregate.sports.values()),
+            "players": rows["SamaggiGamesPlayers"],
+            "teams": rows["SamaggiGamesTeams"]
+        }
+    }, event)
 
+
+@instrumented
+def update_statistics(event, _):
+    return {
+        "batchSize": len(event["Records"]),
+        "applied": StatisticsStore().apply_records(event["Records"])
+    }
+
+
+@instrumented
+def rebuild_statistics(_, __):
+    # One-off job: builds the stored statistics from a full scan once UpdateStatistics is consuming the streams, and
+    # repairs them if they ever drift. Changes made while it scans may be counted twice or missed, so run it when
+    # registrations are quiet.
+    aggregate = StatisticsAggregate()
+    for table, page in ParallelScanner().table_pages("SamaggiGamesPlayers", "SamaggiGamesTeams",
+                                                     "SamaggiGamesSportCount"):
+        aggregate.add_rows(table, page)
+    return StatisticsStore().rebuild(aggregate)
+
+
+SPORT_CLASH_ARGUMENTS = Schema(sport=str, name=str, player_university=str)
+
+
+@instrumented
 def sport_clash(event, _):
-    arguments = DepArguments(event)
+    arguments, error = SPORT_CLASH_ARGUMENTS.parse(event)
+    if error:
+        return error
     sport = arguments["sport"]
     name = arguments["name"]
     player_university = arguments["player_university"]
@@ -329,112 +472,128 @@ def sport_clash(event, _):
         end_time2 = datetime.datetime(2023, 3, 4, end_h2, end_m2, 00)
 
         if not (end_time1 <= start_time2 or end_time2 <= start_time1):
-            return cors({
-                "statusCode": 200,
-                "body": json.dumps({
-                    "message": "Success",
-                    "clash": True,
-                    "sport": reg_sport
-                })
+            return respond(200, {
+                "message": "Success",
+                "clash": True,
+                "sport": reg_sport
             })
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Success",
-            "clash": False
-        })
+    return respond(200, {
+        "message": "Success",
+        "clash": False
     })
 
-def send_discord(message):
-    discord = Discord(url=WEBHOOK_URL)
-    discord.post(content=message)
+def send_discord(message, deadline: float = None) -> Future:
+    global discord_notifier
+    if discord_notifier is None:
+        from notifier import DiscordNotifier
+        discord_notifier = DiscordNotifier(WEBHOOK_URL)
+    return discord_notifier.send(message, deadline)
+
+@instrumented
+def disqualify_teams(_, context):
+    # time.monotonic() value to finish by, or None when run outside Lambda.
+    deadline = None
+    if hasattr(context, "get_remaining_time_in_millis"):
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - RETURN_MARGIN
 
-def disqualify_teams(_, __):
     teams_data = db.table("SamaggiGamesTeams").scan()
     sports = db.table("SamaggiGamesSportCount").scan()
 
-    teams_sport = {}
-    for team_data in teams_data:
-        if team_data["team_university"] not in teams_sport:
-            teams_sport[team_data["team_university"]] = [team_data["sport"]]
-        else:
-            teams_sport[team_data["team_university"]].append(team_data["sport"])
+    # Teams holds one row per supporting university, so collapse them to unique (team, sport) pairs.
+    team_sports = dict.fromkeys((team_data["team_university"], team_data["sport"]) for team_data in teams_data.all())
+    minimum_sizes = {sport["sport_name"]: sport["minimum_size"] for sport in sports.all()}
 
-    players = db.table("SamaggiGamesPlayers").scan()
+    team_sizes = {}
+    for player in db.table("SamaggiGamesPlayers").scan().all():
+        team_sport = (player["team_university"], player["sport"])
+        team_sizes[team_sport] = team_sizes.get(team_sport, 0) + 1
 
     messages = [f"**{str(datetime.datetime.now())}**"]
 
     current_disqualifications = db.table("SamaggiGamesDisqualifications").scan()
+    disqualifications = {record["key"]: record for record in current_disqualifications.all()}
 
     messages.append("")
 
-    for team in teams_sport.keys():
-        for sport in teams_sport[team]:
-            team_players = players.filter("sport", sport).filter("team_university", team)
-            to_disqualify = False
-
-            if len(team_players) < sports.get_where("sport_name", sport)["minimum_size"]:
-                to_disqualify = True
-
-            key = f"{sport}-{team}"
-            if to_disqualify:
-                if not (curr := current_disqualifications.get(key)).exists():
-                    db.table("SamaggiGamesDisqualifications").write({
-                        "key": key,
-                        "time": time.time(),
-                        "active": True,
-                        "disqualified": False
-                    })
-                    messages.append(f"Now tracking **{team}**'s **{sport}** for potential disqualification.")
-                else:
-                    if curr["active"] is False:
-                        db.table("SamaggiGamesDisqualifications").update("key", equals=key, data_to_update={
-                            "time": time.time(),
-                            "active": True
-                        })
-                        messages.append(f"Now re-tracking **{team}**'s **{sport}** for potential disqualification.")
-                    elif curr["active"] is True and curr["disqualified"] is False and time.time() - float(curr["time"]) > 21600:
-                        db.table("SamaggiGamesDisqualifications").update("key", equals=key, data_to_update={
-                            "disqualified": True
-                        })
-                        messages.append(f"**{team}**'s **{sport}** is now disqualified.")
+    # Each state change only sets the attributes it owns, so edits made to a record since the scan are kept.
+    disqualification_writes = TransactionWriter()
 
+    def track(key: str, **changes):
+        disqualification_writes.set("SamaggiGamesDisqualifications", {"key": key}, changes)
+
+    for team, sport in team_sports:
+        to_disqualify = False
+
+        if team_sizes.get((team, sport), 0) < minimum_sizes[sport]:
+            to_disqualify = True
+
+        key = f"{sport}-{team}"
+        curr = disqualifications.get(key)
+        if to_disqualify:
+            if curr is None:
+                track(key, time=time.time(), active=True, disqualified=False)
+                messages.append(f"Now tracking **{team}**'s **{sport}** for potential disqualification.")
             else:
-                if (curr := current_disqualifications.get(key)).exists():
-                    if curr["active"] is True and curr["disqualified"] is False and time.time() - float(curr["time"]) > 21600:
-                        db.table("SamaggiGamesDisqualifications").update("key", equals=key, data_to_update={
-                            "active": False
-                        })
-                        messages.append(f"**{team}**'s **{sport}** is no longer tracked for disqualification.")
+                if curr["active"] is False:
+                    track(key, time=time.time(), active=True)
+                    messages.append(f"Now re-tracking **{team}**'s **{sport}** for potential disqualification.")
+                elif curr["active"] is True and curr["disqualified"] is False and time.time() - float(curr["time"]) > 21600:
+                    track(key, disqualified=True)
+                    messages.append(f"**{team}**'s **{sport}** is now disqualified.")
+
+        else:
+            if curr is not None:
+                if curr["active"] is True and curr["disqualified"] is False and time.time() - float(curr["time"]) > 21600:
+                    track(key, active=False)
+                    messages.append(f"**{team}**'s **{sport}** is no longer tracked for disqualification.")
 
     if len(messages) == 2:
         messages.append("No Update to Display")
 
     messages.append("\n**Disqualified Teams**:")
-    disqualified_teams = current_disqualifications.filter("disqualified", True)
+    disqualified_teams = [key for key, record in disqualifications.items() if record["disqualified"] is True]
 
-    if not disqualified_teams.exists():
+    if not disqualified_teams:
         messages.append("No team has been disqualified yet.")
     else:
-        for dis_team in disqualified_teams.all():
-            messages.append(dis_team["key"])
+        messages.extend(disqualified_teams)
+
+    # The report goes out while the changes are saved. If saving fails the job errors, and the next run reports
+    # whatever was not recorded again.
+    delivery = send_discord("\n".join(messages), deadline)
+    write_report = disqualification_writes.flush()
+
+    try:
+        delivery.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        write_report["notified"] = True
+    except Exception:  # the notifier has already logged the undelivered report, or is still trying
+        write_report["notified"] = False
 
-    send_discord("\n".join(messages))
+    return write_report
 
 if __name__ == '__main__':
     disqualify_teams("", "")
 
+PLAYER_VALID_ARGUMENTS = Schema(team_university=str, player_university=str, sport=str)
+
+
+@instrumented
 def is_player_valid(event, _):  # get player_university, team_university, sport
-    arguments = DepArguments(event)
+    arguments, error = PLAYER_VALID_ARGUMENTS.parse(event)
+    if error:
+        return error
     team_uni = arguments["team_university"]
     player_uni = arguments["player_university"]
     sport = arguments["sport"]
 
-    team_sport_players = db.table("SamaggiGamesPlayers").get(
-        "team_university", equals=team_uni,
-        is_secondary_index=True
-    ).filter("sport", sport)
+    rosters = Rosters(QueryCache())
+    rosters.prefetch("SamaggiGamesPlayers", TEAM_SPORT, team_uni, sport)
+    rosters.prefetch("SamaggiGamesPlayers", PLAYER_SPORT, player_uni, sport)
+
+    team_sport_players = rosters.get(  # all players that play this sport for this uni
+        "SamaggiGamesPlayers", TEAM_SPORT, team_uni, sport
+    )
 
     from DynamoDBInterface.DynamoDB import FilterType
 
@@ -443,25 +602,16 @@ def is_player_valid(event, _):  # get player_university, team_university, sport
                                                     team_uni,
                                                     filter_type=FilterType.NOT_EQUAL)
     if (len(team_support_players) + 1)/(len(team_sport_players) + 1) > 0.5 and player_uni != team_uni:
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": f"At least 50% of the player in the team must be from the Thai Society forming the "
-                        f"team.",
-                "valid": False
-            })
+        return respond(200, {
+            "message": f"At least 50% of the player in the team must be from the Thai Society forming the "
+                    f"team.",
+            "valid": False
         })
 
     allied_unis = []
-    player_data = db.table("SamaggiGamesPlayers").get(  # all players that play for this uni
-        "team_university", equals=team_uni,
-        is_secondary_index=True
-    )
-    filtered_players = player_data.filter("sport", sport)  # all players that play this sport for this uni
-
     uni_player_count = {}
 
-    for player in filtered_players.all():
+    for player in team_sport_players.all():
         if player['player_university'] in uni_player_count:
             uni_player_count[player['player_university']] += 1
         else:
@@ -476,31 +626,24 @@ def is_player_valid(event, _):  # get player_university, team_university, sport
         if university not in allied_unis and uni_player_count[university] > 1:
             allied_unis.append(university)
 
-    similar_players = db.table("SamaggiGamesPlayers").get(  # all players that play for this uni
-        "player_university", equals=player_uni,
-        is_secondary_index=True
-    ).filter("sport", sport)
+    similar_players = rosters.get(  # all players from this uni that play this sport
+        "SamaggiGamesPlayers", PLAYER_SPORT, player_uni, sport
+    )
 
     similar_players_uni = similar_players.count_occurrence("team_university")
 
     if player_uni in similar_players_uni.keys() and player_uni != team_uni:
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": f"{player_uni} already has a team for {sport}.",
-                "valid": False
-            })
+        return respond(200, {
+            "message": f"{player_uni} already has a team for {sport}.",
+            "valid": False
         })
 
     coed_uni = [key for key, value in similar_players_uni.items() if value > 1 and key != player_uni]
 
     if len(coed_uni) > 0 and team_uni not in coed_uni:
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": f"{player_uni} already playing for {coed_uni[0]} for {sport}.",
-                "valid": False
-            })
+        return respond(200, {
+            "message": f"{player_uni} already playing for {coed_uni[0]} for {sport}.",
+            "valid": False
         })
 
     # if len(similar_players_uni.keys()) > 0 and similar_players_uni[0] != team_uni:
@@ -527,55 +670,77 @@ def is_player_valid(event, _):  # get player_university, team_university, sport
     #     filtered_players[j]["player_university"] != filtered_players[j]["team_university"]]
 
     if len(uni_player_count.keys()) > 5:
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": f"{team_uni} {sport} team cannot have more than 5 total universities (including "
-                           f"universities sending individual players).",
-                "valid": False
-            })
+        return respond(200, {
+            "message": f"{team_uni} {sport} team cannot have more than 5 total universities (including "
+                       f"universities sending individual players).",
+            "valid": False
         })
 
     if len(allied_unis) > 3:
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": f"{team_uni} {sport} team already has 2 supporting universities with more than one player.",
-                "valid": False
-            })
+        return respond(200, {
+            "message": f"{team_uni} {sport} team already has 2 supporting universities with more than one player.",
+            "valid": False
         })
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Success",
-            "valid": True
-        })
+    return respond(200, {
+        "message": "Success",
+        "valid": True
+    })
+
+
+def team_row_id(team_university: str, sport: str, university: str) -> str:
+    # Deterministic, so concurrent registrations that both add the same Teams row write one row rather than two.
+    return str(uuid.uuid5(TEAM_ID_NAMESPACE, composite(team_university, sport, university)))
+
+
+def captain_details_error():
+    return respond(400, {
+        "message": "There was an issue getting required parameters (captain details).",
+        "error": "Type: {}, Error Args: {}".format(str(KeyError), str(("captain_name", "captain_contact")))
     })
 
 
+ADD_PLAYER_ARGUMENTS = Schema(
+    team_university=str, sport=str, players=list, image=str,
+    captain_name=optional(str), captain_contact=optional((str, int))
+)
+
+
+@instrumented
 def add_player(event, _):
     details = {}
     # get the players' team_university and sport
-    try:
-        arguments = DepArguments(event)
-        team_university = arguments["team_university"]
-        sport = arguments["sport"]
-    except Exception as e:
-        return cors({
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "There was an issue getting required parameters.",
+    arguments, error = ADD_PLAYER_ARGUMENTS.parse(event)
+    if error:
+        return error
+    team_university = arguments["team_university"]
+    sport = arguments["sport"]
+    captain_name = arguments["captain_name"]
+    captain_contact = arguments["captain_contact"]
+
+    roster = []
+    for player in arguments["players"]:
+        try:  # get each player name and player_university
+            roster.append(with_keys("SamaggiGamesPlayers", {
+                "player_uuid": str(uuid.uuid4()),
+                "sport": sport,
+                "team_university": team_university,
+                "name": player["name"],
+                "nickname": player["nickname"],
+                "player_university": player["player_university"],
+                "image": arguments["image"],
+                "player_city": universities.city_for_name(player["player_university"]),
+                "shirt_number": player["shirt_number"] if "shirt_number" in player else "X"
+            }))
+        except Exception as e:
+            return respond(400, {
+                "message": "Function call requires playerFirstName, playerLastName and player_university.",
                 "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
             })
-        })
 
-    team_data = db.table("SamaggiGamesTeams").get(
-        "team_university", equals=team_university,
-        is_secondary_index=True
-    )
+    team_data = Rosters(QueryCache()).get("SamaggiGamesTeams", TEAM_SPORT, team_university, sport)
 
-    unique_universities = set(team["university"] for team in team_data.all() if team["sport"] == sport)
+    unique_universities = set(team["university"] for team in team_data.all())
 
     # if len(unique_universities) > 3 and player_university not in unique_universities:
     #     return cors({
@@ -586,187 +751,144 @@ def add_player(event, _):
     #         })
     #     })
 
-    if not any(team["sport"] == sport for team in team_data.all()):  # if team not already in SamaggiGamesTeams table
-        try:
-            count_data = db.table("SamaggiGamesSportCount").get(
-                "sport_name", equals=sport, is_secondary_index=False, consistent_read=True
-            )
-        except Exception as e:
-            return cors({
-                "statusCode": 500,
-                "body": json.dumps({
+    if not team_data.exists():  # if team not already in SamaggiGamesTeams table
+        details["willCreateTeam"] = True
+        if captain_name is None or captain_contact is None:
+            return captain_details_error()
+        team_id = team_row_id(team_university, sport, team_university)
+
+        # The team row and the team_count increment commit together, and only while the sport still has a free
+        # slot, so concurrent registrations cannot overfill a sport.
+        details["willUpdateTeamCount"] = True
+        dynamodb = dynamodb_client()
+        try:  # add team to SamaggiGamesTeams table and increment team count
+            dynamodb.transact_write_items(TransactItems=[
+                {
+                    "Put": {
+                        "TableName": "SamaggiGamesTeams",
+                        "Item": serialize(with_keys("SamaggiGamesTeams", {
+                            "team_uuid": team_id,
+                            "sport": sport,
+                            "team_university": team_university,
+                            "captain": captain_name,
+                            "contact": captain_contact,
+                            "university": team_university
+                        })),
+                        # team_id is derived from the team, so a registration racing this one for the same new team
+                        # fails here instead of adding a second Teams row and team_count increment.
+                        "ConditionExpression": "attribute_not_exists(team_uuid)"
+                    }
+                },
+                {
+                    "Update": {
+                        "TableName": "SamaggiGamesSportCount",
+                        "Key": serialize({"sport_name": sport}),
+                        "UpdateExpression": "SET team_count = team_count + :one",
+                        "ConditionExpression": "team_count < max_teams",
+                        "ExpressionAttributeValues": serialize({":one": 1}),
+                        "ReturnValuesOnConditionCheckFailure": "ALL_OLD"
+                    }
+                }
+            ])
+        except dynamodb.exceptions.TransactionCanceledException as e:
+            reasons = e.response.get("CancellationReasons", [])
+            sport_count_failed = len(reasons) > 1 and reasons[1].get("Code") == "ConditionalCheckFailed"
+            if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+                unique_universities.add(team_university)  # created by the racing registration; join it instead
+            elif sport_count_failed and "Item" not in reasons[1]:
+                return respond(500, {
                     "message": f"Unable to get the number of teams for {sport}.",
-                    "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args)),
+                    "error": f"{sport} has no row in SamaggiGamesSportCount.",
                     "data": {
                         "university": sport
                     }
                 })
-            })
-
-        team_count = int(count_data["team_count"])
-        max_team = int(count_data["max_teams"])
-
-        if len(team_data.filter("sport", sport)) >= count_data["max_size"]:
-            return cors({
-                "statusCode": 200,
-                "body": json.dumps({
-                    "message": f"This team already has the maximum number of players"
-                })
-            })
-
-        if team_count >= max_team:  # check if team slot for the sport is full
-            return cors({
-                "statusCode": 200,
-                "body": json.dumps({
+            elif sport_count_failed:
+                return respond(200, {
                     "message": f"{sport} already has the maximum number of teams"
                 })
-            })
-
-        details["willCreateTeam"] = True
-        try:
-            captain_name = arguments["captain_name"]
-            captain_contact = arguments["captain_contact"]
-            team_id = str(uuid.uuid4())
-        except Exception as e:
-            return cors({
-                "statusCode": 400,
-                "body": json.dumps({
-                    "message": "There was an issue getting required parameters (captain details).",
-                    "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args)),
-                })
-            })
-
-        try:  # add team to SamaggiGamesTeams table
-            db.table("SamaggiGamesTeams").write(
-                {
-                    "team_uuid": team_id,
-                    "sport": sport,
-                    "team_university": team_university,
-                    "captain": captain_name,
-                    "contact": captain_contact,
-                    "university": team_university
-                }
-            )
-        except Exception as e:
-            return cors({
-                "statusCode": 500,
-                "body": json.dumps({
+            else:
+                return respond(500, {
                     "message": f"Unable to save team {team_university} to team table.",
                     "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
                 })
-            })
-        else:
-            details["didCreateTeam"] = True
-
-        details["willUpdateTeamCount"] = True  # increment team count
-        try:
-            db.table("SamaggiGamesSportCount").increment(
-                "sport_name", equals=sport,
-                value_key="team_count", by=1
-            )
         except Exception as e:
-            return cors({
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": f"Unable to increment team_count for {sport}. Error: {e.args}",
-                })
+            return respond(500, {
+                "message": f"Unable to save team {team_university} to team table.",
+                "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
             })
         else:
+            details["didCreateTeam"] = True
             details["didUpdateTeamCount"] = True
 
-    for i in range(len(arguments["players"])):
-        try:  # get each player name and player_university
-            name = arguments["players"][i]["name"]
-            nickname = arguments["players"][i]["nickname"]
-            shirt_number = arguments["players"][i]["shirt_number"] if "shirt_number" in arguments["players"][i] else "X"
-            player_university = arguments["players"][i]["player_university"]
-            player_uuid = str(uuid.uuid4())
-        except Exception as e:
-            return cors({
-                "statusCode": 400,
-                "body": json.dumps({
-                    "message": "Function call requires playerFirstName, playerLastName and player_university.",
-                    "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-                })
-            })
-
-        sport_teams = db.table("SamaggiGamesTeams").get(
-            "sport", equals=sport,
-            is_secondary_index=True
-        )
-        uni_in_table = sport_teams.filter("team_university", team_university).filter("university", player_university)
-
-        if not uni_in_table:
-            try:
-                captain_name = arguments["captain_name"]
-                captain_contact = arguments["captain_contact"]
-                team_id = str(uuid.uuid4())
-            except Exception as e:
-                return cors({
-                    "statusCode": 400,
-                    "body": json.dumps({
-                        "message": "There was an issue getting required parameters (captain details).",
-                        "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args)),
-                    })
-                })
+    # team_data already holds every Teams row for this team, so the universities that still need a row can be
+    # worked out once for the whole roster.
+    if details.get("didCreateTeam"):
+        unique_universities.add(team_university)
+    missing_universities = list(dict.fromkeys(
+        player["player_university"] for player in roster if player["player_university"] not in unique_universities
+    ))
+
+    if missing_universities and (captain_name is None or captain_contact is None):
+        return captain_details_error()
+
+    roster_writes = BatchWriter()
+    for player_university in missing_universities:  # add team to SamaggiGamesTeams table
+        roster_writes.put("SamaggiGamesTeams", with_keys("SamaggiGamesTeams", {
+            "team_uuid": team_row_id(team_university, sport, player_university),
+            "sport": sport,
+            "team_university": team_university,
+            "captain": captain_name,
+            "contact": captain_contact,
+            "university": player_university,
+            "time": time.time()
+        }))
+    for player in roster:  # add player to SamaggiGamesPlayers table
+        roster_writes.put("SamaggiGamesPlayers", player)
 
-            try:  # add team to SamaggiGamesTeams table
-                db.table("SamaggiGamesTeams").write(
-                    {
-                        "team_uuid": team_id,
-                        "sport": sport,
-                        "team_university": team_university,
-                        "captain": captain_name,
-                        "contact": captain_contact,
-                        "university": player_university,
-                        "time": time.time()
-                    }
-                )
-            except Exception as e:
-                return cors({
-                    "statusCode": 500,
-                    "body": json.dumps({
-                        "message": f"Unable to save team {team_university} to team table.",
-                        "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-                    })
-                })
+    try:
+        details["writes"] = roster_writes.flush(raise_on_failure=False)
+    except Exception as e:
+        return respond(500, {
+            "message": f"Unable to save players for {team_university} to player table.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
+        })
 
-        try:  # add player to SamaggiGamesPlayers table
-            db.table("SamaggiGamesPlayers").write(
-                {
-                    "player_uuid": player_uuid,
-                    "sport": sport,
-                    "team_university": team_university,
-                    "name": name,
-                    "nickname": nickname,
-                    "player_university": player_university,
-                    "image": arguments["image"],
-                    "player_city": university_city(simplify_university(player_university)),
-                    "shirt_number": shirt_number
-                }
-            )
-        except Exception as e:
-            return cors({
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": f"Unable to save player {name} to player table.",
-                    "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-                })
-            })
+    failed_players = set(
+        request["PutRequest"]["Item"]["player_uuid"]["S"]
+        for table_name, request in roster_writes.failed if table_name == "SamaggiGamesPlayers"
+    )
+    details["players"] = [
+        {
+            "name": player["name"],
+            "player_uuid": player["player_uuid"],
+            "saved": player["player_uuid"] not in failed_players
+        }
+        for player in roster
+    ]
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Success",
+    if roster_writes.failed:
+        return respond(500, {
+            "message": f"Unable to save {len(failed_players)} player(s) to player table.",
             "details": details
         })
+
+    return respond(200, {
+        "message": "Success",
+        "details": details
     })
 
 
+DELETE_PLAYER_ARGUMENTS = Schema(player_uuid=str)
+
+
+@instrumented
 def delete_player(event, _):
     details = {}
 
-    arguments = DepArguments(event)
+    arguments, error = DELETE_PLAYER_ARGUMENTS.parse(event)
+    if error:
+        return error
     player_id: str = arguments["player_uuid"]
 
     deleting_player = db.table("SamaggiGamesPlayers").get(
@@ -774,49 +896,39 @@ def delete_player(event, _):
     )
 
     if not deleting_player.exists():  # if player do not exist
-        return cors({
-            "statusCode": 404,
-            "body": json.dumps({
-                "message": "Cannot find player in the player table.",
-                "error": True
-            })
+        return respond(404, {
+            "message": "Cannot find player in the player table.",
+            "error": True
         })
 
     team_university = deleting_player["team_university"]
     player_university = deleting_player["player_university"]
     sport = deleting_player["sport"]
 
-    sport_players = db.table("SamaggiGamesPlayers").get(
-        "sport", equals=sport,
-        is_secondary_index=True
-    )
+    rosters = Rosters(QueryCache())
+    rosters.prefetch("SamaggiGamesPlayers", TEAM_SPORT, team_university, sport)
+    rosters.prefetch("SamaggiGamesPlayers", PLAYER_SPORT, player_university, sport)
 
-    sport_players_same_team = sport_players.filter("team_university", team_university)
-    sport_players_same_uni = sport_players.filter("player_university", player_university)
+    sport_players_same_team = rosters.get("SamaggiGamesPlayers", TEAM_SPORT, team_university, sport)
+    sport_players_same_uni = rosters.get("SamaggiGamesPlayers", PLAYER_SPORT, player_university, sport)
 
     if team_university == player_university:
         if len(sport_players_same_team) != 1 and \
                 (len(sport_players_same_uni) - 1)/(len(sport_players_same_team) - 1) < 0.5:
-            return cors({
-                "statusCode": 200,
-                "body": json.dumps({
-                    "message": "At least 50% of the player in the team must be from the Thai Society forming the team.",
-                    "error": True
-                })
+            return respond(200, {
+                "message": "At least 50% of the player in the team must be from the Thai Society forming the team.",
+                "error": True
             })
 
     db.table("SamaggiGamesPlayers").delete("player_uuid", equals=player_id)
 
     if sport_players_same_uni.length() == 1:
         details["deleteTeam"] = True
-        team = db.table("SamaggiGamesTeams").get(
-            "sport", equals=sport,
-            is_secondary_index=True
-        ).filter("university", player_university)
+        team = rosters.get("SamaggiGamesTeams", UNIVERSITY_SPORT, player_university, sport)
 
         if team.exists():
             details["deleteTeamExist"] = True
-            team_id = team["team_uuid"]
+            team_id = team[0]["team_uuid"]
             db.table("SamaggiGamesTeams").delete("team_uuid", team_id)
 
         if team_university == player_university:
@@ -826,17 +938,22 @@ def delete_player(event, _):
                 value_key="team_count", by=1
             )
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Player successfully deleted.",
-            "detail": details
-        })
+    return respond(200, {
+        "message": "Player successfully deleted.",
+        "detail": details
     })
 
 
+EDIT_PLAYER_ARGUMENTS = Schema(
+    player_uuid=str, team_university=str, sport=str, name=nullable(str), player_university=str
+)
+
+
+@instrumented
 def edit_player(event, _):
-    arguments = DepArguments(event)
+    arguments, error = EDIT_PLAYER_ARGUMENTS.parse(event)
+    if error:
+        return error
     player_id: str = arguments["player_uuid"]
 
     player_in_table = db.table("SamaggiGamesPlayers").there_exists(  # find player in SamaggiGamesPlayers table
@@ -844,93 +961,104 @@ def edit_player(event, _):
     )
 
     if not player_in_table:  # if player do not exist
-        return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "Cannot find player in the player table."
-            })
+        return respond(200, {
+            "message": "Cannot find player in the player table."
         })
 
     db.table("SamaggiGamesPlayers").delete("player_uuid", player_id)  # delete
 
     # get the new players' details
-    try:
-        team_university = arguments["team_university"]
-        sport = arguments["sport"]
-        name = arguments["name"]
-        player_university = arguments["player_university"]
-        player_uuid = str(uuid.uuid4())
-    except Exception as e:
-        return cors({
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "Function call requires team_university, sport, playerFirstName, playerLastName and "
-                           "player_university",
-                "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-            })
-        })
+    team_university = arguments["team_university"]
+    sport = arguments["sport"]
+    name = arguments["name"]
+    player_university = arguments["player_university"]
+    player_uuid = str(uuid.uuid4())
 
     try:  # add player to SamaggiGamesPlayers table
-        db.table("SamaggiGamesPlayers").write(
-            {
-                "player_uuid": player_uuid,
-                "sport": sport,
-                "team_university": team_university,
-                "name": name,
-                "player_university": player_university
-            }
-        )
+        db.table("SamaggiGamesPlayers").write(with_keys("SamaggiGamesPlayers", {
+            "player_uuid": player_uuid,
+            "sport": sport,
+            "team_university": team_university,
+            "name": name,
+            "player_university": player_university
+        }))
     except Exception as e:
-        return cors({
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": f"Unable to save player {name} to player table.",
-                "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
-            })
+        return respond(500, {
+            "message": f"Unable to save player {name} to player table.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
         })
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Success"
-        })
+    return respond(200, {
+        "message": "Success"
     })
 
 
+GET_TABLE_V2_ARGUMENTS = Schema(
+    tableName=str, filters=list,
+    pageSize=optional((int, str)), nextToken=optional(str), fields=optional(list)
+)
+
+
+@instrumented
 def get_table_v2(event, _):
-    arguments = DepArguments(event)
+    arguments, error = GET_TABLE_V2_ARGUMENTS.parse(event)
+    if error:
+        return error
 
     table_name = arguments["tableName"]
     filters = arguments["filters"]
+    page_size = arguments["pageSize"]
 
-    scan_result = db.table(table_name).scan()
-
-    res = scan_result
-    for f in filters:
-        res = res.filter(f["key"], f["value"])
+    try:
+        check_filters(filters)
+        limit = page_limit(page_size) if page_size is not None else None
+        exclusive_start_key = decode_token(arguments["nextToken"])
+        read_kwargs = projection(arguments["fields"])
+    except ValueError as e:
+        return respond(400, {
+            "message": "filters must be {key, value} objects, pageSize a positive number, nextToken a token returned "
+                       "by get_table_v2 and fields attribute names.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
+        })
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Table Retrieved.",
-            "tableData": res.all()
+    try:
+        with phase("plan"):
+            query_plan = plan(dynamodb_client(), table_name, filters)
+        with phase("read"):
+            rows, last_evaluated_key = execute(
+                dynamodb_client(), query_plan, limit=limit, exclusive_start_key=exclusive_start_key, **read_kwargs
+            )
+    except dynamodb_client().exceptions.ResourceNotFoundException as e:
+        return respond(404, {
+            "message": f"Table {table_name} does not exist.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
+        })
+    except Exception as e:
+        return respond(500, {
+            "message": "Unable to read table.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
         })
-    })
 
-def edit_contact(event, _):
-    args = Arguments(event)
-    args.require(["team_id", "name", "contact"])
+    return respond(200, {
+        "message": "Table Retrieved.",
+        "tableData": rows,
+        "nextToken": encode_token(last_evaluated_key),
+        "plan": query_plan.describe()
+    }, event)
+
+EDIT_CONTACT_ARGUMENTS = Schema(team_id=str, name=nullable(str), contact=nullable(NUMBER + (str,)))
 
-    if args.should_error():
-        return args.error
+
+@instrumented
+def edit_contact(event, _):
+    args, error = EDIT_CONTACT_ARGUMENTS.parse(event)
+    if error:
+        return error
 
     if not db.table("SamaggiGamesTeams").there_exists(args["team_id"]):
-        return cors({
-            "statusCode": 404,
-            "body": json.dumps({
-                "message": f"Team {args['team_id']} does not exist.",
-                "error": ""
-            })
+        return respond(404, {
+            "message": f"Team {args['team_id']} does not exist.",
+            "error": ""
         })
 
     db.table("SamaggiGamesTeams").update(args["team_id"], data_to_update={
@@ -938,118 +1066,131 @@ def edit_contact(event, _):
         "contact": args["contact"]
     })
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Success"
-        })
+    return respond(200, {
+        "message": "Success"
     })
 
 
-def get_table(event, _):
-    arguments = Arguments(event)
-    arguments.require(["table_name"])
+GET_TABLE_ARGUMENTS = Schema(
+    table_name=str,
+    page_size=optional((int, str)), next_token=optional(str), fields=optional(list)
+)
 
-    if arguments.should_error():
-        return arguments.error
 
-    response = db.table(arguments["table_name"]).scan()
+@instrumented
+def get_table(event, _):
+    arguments, error = GET_TABLE_ARGUMENTS.parse(event)
+    if error:
+        return error
 
-    s3 = boto3.client("s3", region_name="eu-west-2", config=boto3.session.Config(signature_version='s3v4',
-                                                                                 s3={'addressing_style': 'path'}))
+    page_size = arguments["page_size"]
 
-    if not response.exists():
-        return cors({
-            "statusCode": 404,
-            "body": json.dumps({
-                "message": "The table does not contain any data or the table does not exist.",
-                "error": "No data."
-            })
+    try:
+        limit = page_limit(page_size) if page_size is not None else None
+        decode_token(arguments["next_token"])
+        scan_kwargs = projection(arguments["fields"])
+    except ValueError as e:
+        return respond(400, {
+            "message": "page_size must be a positive number, next_token a token returned by get_table and fields "
+                       "attribute names.",
+            "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
         })
 
-    def get_pre_signed(x):
-        if x == "":
-            return ""
-
-        return s3.generate_presigned_url(
-            ClientMethod="get_object",
-            Params={
-                "Bucket": "samaggi-games-id",
-                "Key": x
-            },
-            ExpiresIn=21600
-        )
-
-    response = response.apply(get_pre_signed, "image", new_col="image-link")
+    try:
+        with phase("read"):
+            if limit is None:
+                response, next_token = ParallelScanner().all(arguments["table_name"], **scan_kwargs), None
+            else:
+                response, next_token = scan_page(
+                    ParallelScanner(), arguments["table_name"], limit, arguments["next_token"], **scan_kwargs
+                )
+    except dynamodb_client().exceptions.ResourceNotFoundException:
+        response, next_token = [], None
 
-    return cors({
-        "statusCode": 200,
-        "body": json.dumps({
-            "message": "Success",
-            "data": response.all()
-        }, cls=DecimalEncoder)
-    })
+    if not response and next_token is None:
+        return respond(404, {
+            "message": "The table does not contain any data or the table does not exist.",
+            "error": "No data."
+        })
 
+    with phase("presign"):
+        image_urls = image_links.urls_for(s3_client(), (row.get("image", "") for row in response))
 
-def write_spectator(event, __):
-    arguments = DepArguments(event)
-    arguments.require(["formData", "paymentVerification", "amount"])
-
-    if not arguments.available():
-        return arguments.error
-    if not arguments.contains_requirements():
-        return cors({
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "Missing Arguments",
-                "data": {
-                    "expects": arguments.requirements(),
-                    "got": arguments.keys()
-                }
-            }, cls=DecimalEncoder)
-        })
+    for row in response:
+        if "image" in row:
+            row["image-link"] = image_urls.get(row["image"], "")
 
-    spectators = db.table("SamaggiGamesSpectator").scan()
-    payments = db.table("SamaggiGamesPayment").scan()
+    return respond(200, {
+        "message": "Success",
+        "data": response,
+        "next_token": next_token
+    }, event)
 
-    spector_payments = spectators.join(payments, "payment-id")
 
-    used_payments = spector_payments.unique("payment-verification")
+WRITE_SPECTATOR_ARGUMENTS = Schema(formData=dict, paymentVerification=str, amount=nullable(NUMBER + (str,)))
 
-    if arguments.get("paymentVerification") in used_payments:
-        return cors({
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "Payment Verification Already Used",
-                "data": {}
-            }, cls=DecimalEncoder)
-        })
 
-    payment_data = payments.get_where("payment-verification", arguments.get("paymentVerification"))
+@instrumented
+def write_spectator(event, __):
+    arguments, error = WRITE_SPECTATOR_ARGUMENTS.parse(event)
+    if error:
+        return error
 
-    db.table("SamaggiGamesPayment").update(
-        payment_data["payment-id"],
-        data_to_update={
-            "amount": arguments.get("amount")
-        }
-    )
+    # Any index keyed on payment-verification will do; QueryCache finds it through describe_table.
+    payment_data = QueryCache().get("SamaggiGamesPayment", "payment-verification",
+                                    equals=arguments.get("paymentVerification")).all()
 
-    if payment_data == {}:
-        return cors({
-            "statusCode": 404,
-            "body": json.dumps({
-                "message": "Payment Code Not Found",
-                "data": {}
-            }, cls=DecimalEncoder)
+    if not payment_data:
+        return respond(404, {
+            "message": "Payment Code Not Found",
+            "data": {}
         })
 
+    payment_data = payment_data[0]
+    spectator_id = str(uuid.uuid4())
+
     data = arguments.get("formData")
     data.update({
-        "spectator-id": str(uuid.uuid4()),
+        "spectator-id": spectator_id,
         "payment-id": payment_data["payment-id"]
     })
 
-    db.table("SamaggiGamesSpectator").write(data)
+    # Claiming the payment, recording the amount and saving the spectator commit together: a code can only ever be
+    # used once, even when the same form is submitted twice at the same moment, and a failed spectator write cannot
+    # leave the payment claimed.
+    dynamodb = dynamodb_client()
+    try:
+        dynamodb.transact_write_items(TransactItems=[
+            {
+                "Update": {
+                    "TableName": "SamaggiGamesPayment",
+                    "Key": serialize({"payment-id": payment_data["payment-id"]}),
+                    "UpdateExpression": "SET #amount = :amount, #claim = :spectator",
+                    "ConditionExpression": "attribute_not_exists(#claim)",
+                    "ExpressionAttributeNames": {"#amount": "amount", "#claim": "spectator-id"},
+                    "ExpressionAttributeValues": serialize({
+                        ":amount": arguments.get("amount"),
+                        ":spectator": spectator_id
+                    })
+                }
+            },
+            {
+                "Put": {
+                    "TableName": "SamaggiGamesSpectator",
+                    "Item": serialize(data),
+                    "ConditionExpression": "attribute_not_exists(#id)",
+                    "ExpressionAttributeNames": {"#id": "spectator-id"}
+                }
+            }
+        ])
+    except dynamodb.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get("CancellationReasons", [])
+        if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+            return respond(400, {
+                "message": "Payment Verification Already Used",
+                "data": {}
+            })
+        raise
 
     # return cors({
     #         "statusCode": 200,
@@ -1061,36 +1202,131 @@ def write_spectator(event, __):
     #         }, cls=DecimalEncoder)
     #     })
 
-    return cors({
-        "statusCode": 400,
-        "body": json.dumps({
-            "message": "Form Closed. Please buy your ticket at the event.",
-            "data": {}
-        })
+    return respond(400, {
+        "message": "Form Closed. Please buy your ticket at the event.",
+        "data": {}
     })
 
 
-def get_payment_code(_, __):
-    verifications = db.table("SamaggiGamesPayment").scan().unique("payment-verification")
+@instrumented
+def claim_existing_payments(_, __):
+    # One-off backfill: marks payments used by spectators registered before payments carried their claim. Only the
+    # claim is set, and only while the payment is unclaimed, so payments claimed meanwhile by write_spectator are
+    # left alone (counted as skipped).
+    claims = UpdateWriter()
+    payments = {
+        payment["payment-id"]: payment
+        for payment in ParallelScanner().all("SamaggiGamesPayment", ProjectionExpression="#id, #claim",
+                                             ExpressionAttributeNames={"#id": "payment-id", "#claim": "spectator-id"})
+    }
 
-    verification = str(uuid.uuid4())[:8]
-    while verification in verifications:
-        verification = str(uuid.uuid4())[:8]
+    for spectator in ParallelScanner().all("SamaggiGamesSpectator"):
+        payment = payments.get(spectator.get("payment-id"))
+        if payment is not None and "spectator-id" not in payment:
+            claims.set("SamaggiGamesPayment", {"payment-id": payment["payment-id"]},
+                       {"spectator-id": spectator["spectator-id"]},
+                       condition="attribute_not_exists(#claim)", names={"#claim": "spectator-id"})
+            payment["spectator-id"] = spectator["spectator-id"]
+
+    return claims.flush()
+
+
+@instrumented
+def reserve_existing_payment_codes(_, __):
+    # One-off backfill: reserves the verification codes issued before codes were reserved at allocation time.
+    reservations = BatchWriter()
+    for payment in ParallelScanner().all("SamaggiGamesPayment", ProjectionExpression="#id, #code",
+                                         ExpressionAttributeNames={"#id": "payment-id", "#code": "payment-verification"}):
+        reservations.put(PAYMENT_CODES_TABLE, {
+            "payment-verification": payment["payment-verification"],
+            "payment-id": payment["payment-id"]
+        })
+    return reservations.flush()
+
+
+@instrumented
+def migrate_roster_keys(_, __):
+    # One-off migration: creates the composite roster indexes and fills in the composite attributes of rows written
+    # before add_player and edit_player set them. Only those attributes are set, and only while the fields they are
+    # built from are unchanged, so rows edited or deleted meanwhile are skipped rather than overwritten. Re-run until
+    # it reports complete: the run that finds every index ACTIVE and every row up to date records the migration, and
+    # handlers switch to the composite indexes after that.
+    dynamodb = dynamodb_client()
+    pending = {}
+    rows = UpdateWriter()
+    for table_name, key in (("SamaggiGamesPlayers", "player_uuid"), ("SamaggiGamesTeams", "team_uuid")):
+        pending[table_name] = ensure_indexes(dynamodb, table_name)
+        for item in ParallelScanner().all(table_name):
+            keys = stale_keys(table_name, item)
+            if keys:
+                parts = key_parts(table_name, item)
+                rows.set(table_name, {key: item[key]}, keys,
+                         condition=" AND ".join(f"#p{i} = :p{i}" for i in range(len(parts))),
+                         names={f"#p{i}": part for i, part in enumerate(parts)},
+                         condition_values={f":p{i}": value for i, value in enumerate(parts.values())})
+
+    writes = rows.flush()
+    complete = not any(pending.values()) and writes["requests"] == 0
+    if complete:
+        dynamodb.put_item(TableName=MIGRATION_TABLE, Item=serialize(migration_marker()))
+
+    return {
+        "pendingIndexes": pending,
+        "writes": writes,
+        "complete": complete
+    }
 
-    db.table("SamaggiGamesPayment").write({
-        "payment-id": str(uuid.uuid4()),
-        "payment-verification": verification,
-        "paid": False,
-        "notified": False,
-        "amount": -1
-    })
 
-    return cors({
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "Success",
-                "data": {
-                    "verification": verification
+@instrumented
+def get_payment_code(_, __):
+    # Each code is reserved in its own table under a uniqueness condition, together with the payment row, so
+    # allocation costs one transaction (plus a retry on the rare collision) however many payments exist.
+    dynamodb = dynamodb_client()
+
+    for attempt in range(MAX_PAYMENT_CODE_ATTEMPTS):
+        payment_id = str(uuid.uuid4())
+        verification = str(uuid.uuid4())[:8]
+        try:
+            dynamodb.transact_write_items(TransactItems=[
+                {
+                    "Put": {
+                        "TableName": PAYMENT_CODES_TABLE,
+                        "Item": serialize({
+                            "payment-verification": verification,
+                            "payment-id": payment_id
+                        }),
+                        "ConditionExpression": "attribute_not_exists(#code)",
+                        "ExpressionAttributeNames": {"#code": "payment-verification"}
+                    }
+                },
+                {
+                    "Put": {
+                        "TableName": "SamaggiGamesPayment",
+                        "Item": serialize({
+                            "payment-id": payment_id,
+                            "payment-verification": verification,
+                            "paid": False,
+                            "notified": False,
+                            "amount": -1
+                        })
+                    }
                 }
-            }, cls=DecimalEncoder)
+            ])
+        except dynamodb.exceptions.TransactionCanceledException as e:
+            reasons = e.response.get("CancellationReasons", [])
+            if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+                continue
+            raise
+        break
+    else:
+        return respond(500, {
+            "message": "Unable to allocate a unique payment code.",
+            "data": {}
         })
+
+    return respond(200, {
+        "message": "Success",
+        "data": {
+            "verification": verification
+        }
+    })
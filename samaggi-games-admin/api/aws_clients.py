@@ -0,0 +1,74 @@
+import threading
+
+from instrumentation import attach
+
+# Handlers fan out to thread pools (up to 16 scan segments for each of 3 tables), so keep enough pooled connections for
+# every worker to reuse a warm TLS connection.
+MAX_POOL_CONNECTIONS = 50
+
+# botocore.config.Config arguments. boto3 and botocore are only imported when the first client is built, so
+# handlers that never reach AWS (and cold starts in general) do not pay for them.
+BASE_CONFIG = dict(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=10,
+    retries={
+        "mode": "standard",
+        "max_attempts": 5
+    }
+)
+
+S3_CONFIG = dict(
+    BASE_CONFIG,
+    region_name="eu-west-2",
+    signature_version="s3v4",
+    s3={"addressing_style": "path"}
+)
+
+_lock = threading.Lock()
+_session = None
+_clients = {}
+
+
+def _get(name: str, factory):
+    # Built on first use and then reused for the lifetime of the container.
+    if name not in _clients:
+        with _lock:
+            if name not in _clients:
+                global _session
+                if _session is None:
+                    import boto3
+                    _session = boto3.session.Session()
+                _clients[name] = factory(_session)
+    return _clients[name]
+
+
+def _config(options):
+    from botocore.config import Config
+    return Config(**options)
+
+
+def dynamodb_client():
+    return _get("dynamodb_client", lambda session: attach(session.client("dynamodb", config=_config(BASE_CONFIG))))
+
+
+def s3_client():
+    return _get("s3_client", lambda session: attach(session.client("s3", config=_config(S3_CONFIG))))
+
+
+def tune_default_session():
+    """Gives the clients libraries build from boto3's default session, e.g. DynamoDBInterface's resource, the same
+    pool size, timeouts and retries as ours. The library takes neither a client nor a config, so it still keeps its
+    own connection pool."""
+    import boto3
+    if boto3.DEFAULT_SESSION is None:
+        boto3.setup_default_session()
+    # botocore merges this into the config of every client (and resource) the session creates from now on.
+    boto3.DEFAULT_SESSION._session.set_default_client_config(_config(BASE_CONFIG))
+
+
+def override(**clients):
+    """Replaces clients by name (e.g. `dynamodb_client=...`) for every later caller, used by the local backend."""
+    with _lock:
+        _clients.update(clients)
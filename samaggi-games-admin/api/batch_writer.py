@@ -0,0 +1,260 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Any, List, Optional
+
+from aws_clients import dynamodb_client
+
+BATCH_SIZE = 25  # BatchWriteItem limit
+TRANSACTION_SIZE = 100  # TransactWriteItems limit
+MAX_ATTEMPTS = 8
+BASE_DELAY = 0.05
+MAX_DELAY = 2.0
+
+# Cancellation reasons that say nothing about the updates themselves, so the same transaction may succeed later.
+RETRYABLE_CANCELLATIONS = {"None", "TransactionConflict", "ThrottlingError", "ProvisionedThroughputExceeded"}
+
+_serializer = None
+
+
+def to_dynamodb(value: Any) -> Any:
+    # TypeSerializer refuses floats, while the helper library accepts them, so keep call sites unchanged.
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: to_dynamodb(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_dynamodb(item) for item in value]
+    return value
+
+
+def serialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    global _serializer
+    if _serializer is None:  # deferred so importing this module does not load boto3
+        from boto3.dynamodb.types import TypeSerializer
+        _serializer = TypeSerializer()
+    return {key: _serializer.serialize(to_dynamodb(value)) for key, value in item.items()}
+
+
+def backoff(attempt: int):
+    time.sleep(random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1))))
+
+
+def update_request(table_name: str, key: Dict[str, Any], values: Dict[str, Any], condition: Optional[str] = None,
+                   names: Optional[Dict[str, str]] = None,
+                   condition_values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """The UpdateItem arguments that set each attribute in `values` on the item at `key`, creating it if needed.
+    `condition` may use its own `names` and `condition_values` placeholders alongside the generated #u<n>/:u<n>
+    ones."""
+    attribute_names = {f"#u{i}": name for i, name in enumerate(values)}
+    attribute_values = {f":u{i}": value for i, value in enumerate(values.values())}
+    request = {
+        "TableName": table_name,
+        "Key": serialize(key),
+        "UpdateExpression": "SET " + ", ".join(f"#u{i} = :u{i}" for i in range(len(values))),
+        "ExpressionAttributeNames": dict(attribute_names, **(names or {})),
+        "ExpressionAttributeValues": serialize(dict(attribute_values, **(condition_values or {})))
+    }
+    if condition is not None:
+        request["ConditionExpression"] = condition
+    return request
+
+
+class BatchWriter:
+    """Collects puts and deletes across tables and sends them with BatchWriteItem, retrying unprocessed items with
+    exponential backoff."""
+
+    def __init__(self, client=None, max_attempts: int = MAX_ATTEMPTS):
+        self._client = client if client is not None else dynamodb_client()
+        self._max_attempts = max_attempts
+        self._pending: List[tuple] = []
+        self.failed: List[tuple] = []
+        self.flushed = 0
+        self.retried = 0
+        self.requests = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, table_name: str, item: Dict[str, Any]):
+        self._pending.append((table_name, {"PutRequest": {"Item": serialize(item)}}))
+
+    def delete(self, table_name: str, key: Dict[str, Any]):
+        self._pending.append((table_name, {"DeleteRequest": {"Key": serialize(key)}}))
+
+    def _send(self, request_items: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        for attempt in range(self._max_attempts):
+            if attempt > 0:
+                self.retried += sum(len(requests) for requests in request_items.values())
+                backoff(attempt)
+
+            self.requests += 1
+            request_items = self._client.batch_write_item(RequestItems=request_items).get("UnprocessedItems", {})
+            if not request_items:
+                return {}
+
+        return request_items
+
+    def flush(self, raise_on_failure: bool = True) -> Dict[str, int]:
+        """With raise_on_failure=False, items still unprocessed after the last attempt are left in `failed` as
+        (table_name, request) pairs instead of raising."""
+        pending, self._pending = self._pending, []
+
+        for start in range(0, len(pending), BATCH_SIZE):
+            request_items = {}
+            for table_name, request in pending[start:start + BATCH_SIZE]:
+                request_items.setdefault(table_name, []).append(request)
+
+            unprocessed = self._send(request_items)
+            failed = [(table_name, request) for table_name, requests in unprocessed.items() for request in requests]
+            self.failed.extend(failed)
+            self.flushed += len(pending[start:start + BATCH_SIZE]) - len(failed)
+
+        if self.failed and raise_on_failure:
+            raise RuntimeError("Unable to write {} item(s) after {} attempts.".format(
+                len(self.failed), self._max_attempts
+            ))
+
+        return self.report()
+
+    def report(self) -> Dict[str, int]:
+        return {
+            "flushed": self.flushed,
+            "retried": self.retried,
+            "failed": len(self.failed),
+            "requests": self.requests
+        }
+
+
+class UpdateWriter:
+    """Collects UpdateItem calls that SET individual attributes, so jobs change only the fields they own rather than
+    putting back whole scanned items over concurrent edits, and sends them from a small thread pool. Throttled calls
+    are retried by the client itself; updates whose condition fails are counted as skipped."""
+
+    def __init__(self, client=None, max_workers: int = 8):
+        self._client = client if client is not None else dynamodb_client()
+        self._max_workers = max_workers
+        self._pending: List[Dict[str, Any]] = []
+        self.failed: List[tuple] = []
+        self.flushed = 0
+        self.skipped = 0
+        self.requests = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def set(self, table_name: str, key: Dict[str, Any], values: Dict[str, Any], condition: Optional[str] = None,
+            names: Optional[Dict[str, str]] = None, condition_values: Optional[Dict[str, Any]] = None):
+        """Queues `update_request(table_name, key, values, ...)`."""
+        self._pending.append(update_request(table_name, key, values, condition, names, condition_values))
+
+    def _send(self, request: Dict[str, Any]):
+        """True once applied, False when the condition failed, or the exception that stopped it."""
+        try:
+            self._client.update_item(**request)
+        except self._client.exceptions.ConditionalCheckFailedException:
+            return False
+        except Exception as e:
+            return e
+        return True
+
+    def flush(self, raise_on_failure: bool = True) -> Dict[str, int]:
+        """With raise_on_failure=False, updates that errored are left in `failed` as (request, exception) pairs
+        instead of raising."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return self.report()
+
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(pending))) as executor:
+            outcomes = list(executor.map(self._send, pending))
+
+        self.requests += len(pending)
+        for request, outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                self.failed.append((request, outcome))
+            elif outcome:
+                self.flushed += 1
+            else:
+                self.skipped += 1
+
+        if self.failed and raise_on_failure:
+            raise RuntimeError("Unable to apply {} update(s): {}".format(len(self.failed), self.failed[0][1]))
+
+        return self.report()
+
+    def report(self) -> Dict[str, int]:
+        return {
+            "flushed": self.flushed,
+            "skipped": self.skipped,
+            "failed": len(self.failed),
+            "requests": self.requests
+        }
+
+
+class TransactionWriter:
+    """Collects updates that SET individual attributes, like UpdateWriter, but sends them with TransactWriteItems in
+    chunks of up to 100, so a job saves its changes in a few round trips. A chunk is applied or cancelled as a whole;
+    chunks cancelled by conflicting writes or throttling are retried with exponential backoff."""
+
+    def __init__(self, client=None, max_attempts: int = MAX_ATTEMPTS):
+        self._client = client if client is not None else dynamodb_client()
+        self._max_attempts = max_attempts
+        self._pending: List[Dict[str, Any]] = []
+        self.failed: List[tuple] = []
+        self.flushed = 0
+        self.retried = 0
+        self.requests = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def set(self, table_name: str, key: Dict[str, Any], values: Dict[str, Any], condition: Optional[str] = None,
+            names: Optional[Dict[str, str]] = None, condition_values: Optional[Dict[str, Any]] = None):
+        """Queues `update_request(table_name, key, values, ...)`. A failed condition cancels its whole chunk."""
+        self._pending.append(update_request(table_name, key, values, condition, names, condition_values))
+
+    def _send(self, chunk: List[Dict[str, Any]]) -> Optional[Exception]:
+        """None once the chunk is applied, otherwise the exception that stopped it."""
+        for attempt in range(self._max_attempts):
+            if attempt > 0:
+                self.retried += len(chunk)
+                backoff(attempt)
+
+            self.requests += 1
+            try:
+                self._client.transact_write_items(TransactItems=[{"Update": request} for request in chunk])
+                return None
+            except self._client.exceptions.TransactionCanceledException as e:
+                reasons = e.response.get("CancellationReasons", [])
+                if not all(reason.get("Code") in RETRYABLE_CANCELLATIONS for reason in reasons):
+                    return e
+                error = e
+
+        return error
+
+    def flush(self, raise_on_failure: bool = True) -> Dict[str, int]:
+        """With raise_on_failure=False, updates whose chunk could not be applied are left in `failed` as
+        (request, exception) pairs instead of raising."""
+        pending, self._pending = self._pending, []
+
+        for start in range(0, len(pending), TRANSACTION_SIZE):
+            chunk = pending[start:start + TRANSACTION_SIZE]
+            error = self._send(chunk)
+            if error is None:
+                self.flushed += len(chunk)
+            else:
+                self.failed.extend((request, error) for request in chunk)
+
+        if self.failed and raise_on_failure:
+            raise RuntimeError("Unable to apply {} update(s): {}".format(len(self.failed), self.failed[0][1]))
+
+        return self.report()
+
+    def report(self) -> Dict[str, int]:
+        return {
+            "flushed": self.flushed,
+            "retried": self.retried,
+            "failed": len(self.failed),
+            "requests": self.requests
+        }
@@ -0,0 +1,200 @@
+"""Per-invocation metrics for the Lambda handlers.
+
+`@instrumented` wraps a handler so each invocation records its wall time, status code (or the exception it raised),
+named phases (`with phase("parse")`), every DynamoDB/S3 call made through an attached client, the capacity DynamoDB
+reports as consumed and the size of the response, then prints them as one `METRICS {...}` JSON line. `collect()`
+captures the same records in-process.
+
+Invocations are tracked per thread. A Lambda container serves one at a time, so calls made from a handler's
+worker threads (parallel scans, prefetches) are attributed to the only active invocation; when several run at once
+(e.g. under the local server) such calls are left unattributed rather than guessed.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable
+
+METRICS_PREFIX = "METRICS "
+# METRICS_LOG=off keeps records in-process (see `collect`) without printing them, e.g. while benchmarking.
+LOG_RECORDS = os.environ.get("METRICS_LOG", "on") != "off"
+
+# Operations that accept ReturnConsumedCapacity.
+CAPACITY_OPERATIONS = {
+    "GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan",
+    "BatchGetItem", "BatchWriteItem", "TransactGetItems", "TransactWriteItems"
+}
+
+_lock = threading.Lock()
+_active: Dict[int, "Invocation"] = {}
+_sinks: List[Callable[[Dict[str, Any]], None]] = []
+_cold_start = True
+
+
+class Invocation:
+
+    def __init__(self, handler: str, request_id: Optional[str] = None, cold_start: bool = False):
+        self.handler = handler
+        self.request_id = request_id
+        self.cold_start = cold_start
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.calls: Dict[str, Dict[str, float]] = {}
+        self.consumed_capacity: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_phase(self, name: str, elapsed_ms: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed_ms
+
+    def add_call(self, operation: str, elapsed_ms: float):
+        with self._lock:
+            call = self.calls.setdefault(operation, {"count": 0, "ms": 0.0})
+            call["count"] += 1
+            call["ms"] += elapsed_ms
+
+    def add_capacity(self, consumed):
+        # A single ConsumedCapacity for one-table operations, a list for batches and transactions.
+        for entry in consumed if isinstance(consumed, list) else [consumed]:
+            with self._lock:
+                table = entry.get("TableName", "unknown")
+                self.consumed_capacity[table] = self.consumed_capacity.get(table, 0.0) + entry.get("CapacityUnits", 0)
+
+    def record(self, response: Any, error: Optional[BaseException] = None) -> Dict[str, Any]:
+        body = response.get("body") if isinstance(response, dict) else None
+        return {
+            "handler": self.handler,
+            "request_id": self.request_id,
+            "cold_start": self.cold_start,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "status_code": response.get("statusCode") if isinstance(response, dict) else None,
+            "error": type(error).__name__ if error is not None else None,
+            "response_bytes": len(body.encode()) if isinstance(body, str) else 0,
+            "phases": {name: round(ms, 3) for name, ms in self.phases.items()},
+            "calls": {
+                operation: {"count": call["count"], "ms": round(call["ms"], 3)}
+                for operation, call in sorted(self.calls.items())
+            },
+            "consumed_capacity": self.consumed_capacity
+        }
+
+
+def current() -> Optional[Invocation]:
+    invocation = _active.get(threading.get_ident())
+    if invocation is None:
+        active = list(_active.values())
+        if len(active) == 1:
+            invocation = active[0]
+    return invocation
+
+
+@contextmanager
+def phase(name: str):
+    invocation = current()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if invocation is not None:
+            invocation.add_phase(name, (time.perf_counter() - start) * 1000)
+
+
+def record_call(service: str, operation: str, elapsed_ms: float, consumed=None):
+    invocation = current()
+    if invocation is not None:
+        invocation.add_call(f"{service}.{operation}", elapsed_ms)
+        if consumed:
+            invocation.add_capacity(consumed)
+
+
+def emit(record: Dict[str, Any]):
+    for sink in list(_sinks):
+        sink(record)
+    if LOG_RECORDS:
+        print(METRICS_PREFIX + json.dumps(record, separators=(",", ":"), default=str))
+
+
+def parse_line(line: str) -> Optional[Dict[str, Any]]:
+    """The record logged on `line`, or None if it is not a metrics line."""
+    line = line.strip()
+    return json.loads(line[len(METRICS_PREFIX):]) if line.startswith(METRICS_PREFIX) else None
+
+
+@contextmanager
+def collect():
+    """Yields a list that receives every metrics record emitted inside the block."""
+    records: List[Dict[str, Any]] = []
+    with _lock:
+        _sinks.append(records.append)
+    try:
+        yield records
+    finally:
+        with _lock:
+            _sinks.remove(records.append)
+
+
+def instrumented(handler):
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start
+        thread = threading.get_ident()
+        # A handler called from another instrumented handler is part of that invocation.
+        if thread in _active:
+            return handler(event, context)
+
+        with _lock:
+            cold_start, _cold_start = _cold_start, False
+        invocation = Invocation(handler.__name__, getattr(context, "aws_request_id", None), cold_start)
+        _active[thread] = invocation
+        response, error = None, None
+        try:
+            response = handler(event, context)
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            del _active[thread]
+            emit(invocation.record(response, error))
+
+    return wrapper
+
+
+def _provide_params(params, model, **_):
+    if current() is not None and model.name in CAPACITY_OPERATIONS:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _before_call(context, **_):
+    context["instrumentation_started"] = time.perf_counter()
+
+
+def _after_call(parsed, model, context, **_):
+    started = context.get("instrumentation_started")
+    if started is not None:
+        record_call(
+            model.service_model.service_name, model.name, (time.perf_counter() - started) * 1000,
+            (parsed or {}).get("ConsumedCapacity")
+        )
+
+
+def _register(events):
+    events.register("provide-client-params.dynamodb.*", _provide_params, unique_id="instrumentation-params")
+    events.register("before-call.*.*", _before_call, unique_id="instrumentation-before-call")
+    events.register("after-call.*.*", _after_call, unique_id="instrumentation-after-call")
+
+
+def attach(client):
+    """Reports the calls made by a boto3 client to the active invocation."""
+    _register(client.meta.events)
+    return client
+
+
+def attach_default_session():
+    # For libraries that build their clients from boto3's default session, e.g. DynamoDBInterface.
+    import boto3
+    if boto3.DEFAULT_SESSION is None:
+        boto3.setup_default_session()
+    _register(boto3.DEFAULT_SESSION.events)
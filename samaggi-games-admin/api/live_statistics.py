@@ -0,0 +1,188 @@
+"""The statistics data_statistics reports, kept in SamaggiGamesStatistics from the Players, Teams and SportCount
+streams (NEW_AND_OLD_IMAGES).
+
+The table holds aggregates only: one item per distinct tracked value with the number of rows carrying it, one item
+per sport with its SportCount row, and a marker saying the items have been built. Stream records change them with
+ADD (and put/delete for sports), so no item grows with the number of players and a batch writes a few small items
+per record rather than rewriting one large one.
+"""
+import time
+from typing import Dict, Any, List, Optional, Iterable
+
+from aws_clients import dynamodb_client
+from batch_writer import BatchWriter, serialize
+from scanner import ParallelScanner, deserialize
+
+STATISTICS_TABLE = "SamaggiGamesStatistics"
+BUILT_KEY = "built"
+
+# source table -> {statistic: column counted in that table}
+TRACKED_COLUMNS = {
+    "SamaggiGamesPlayers": {"players": "name"},
+    "SamaggiGamesTeams": {"main_universities": "team_university", "player_universities": "university"},
+}
+SPORT_COUNT_TABLE = "SamaggiGamesSportCount"
+SPORTS = "sports"
+
+_MISSING = object()
+
+
+def source_table(record: Dict[str, Any]) -> str:
+    # arn:aws:dynamodb:<region>:<account>:table/<name>/stream/<label>
+    return record["eventSourceARN"].split(":table/")[1].split("/")[0]
+
+
+def item_key(statistic: str, value: Any) -> str:
+    return f"{statistic}#{value}"
+
+
+class StatisticsAggregate:
+    """How many rows carry each value of the tracked columns, plus every SportCount row by sport. A value is unique
+    to the endpoint while its count is above zero."""
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[Any, int]] = {
+            statistic: {} for columns in TRACKED_COLUMNS.values() for statistic in columns
+        }
+        self.sports: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[Dict[str, Any]]) -> "StatisticsAggregate":
+        aggregate = cls()
+        for item in items:
+            statistic = item.get("statistic")
+            if statistic == SPORTS:
+                aggregate.sports[item["value"]] = item["row"]
+            elif statistic in aggregate.counts:
+                aggregate.counts[statistic][item["value"]] = int(item["count"])
+        return aggregate
+
+    def add_row(self, table: str, row: Dict[str, Any]):
+        if table == SPORT_COUNT_TABLE:
+            # Numbers come back from DynamoDB as Decimals; the response has always carried them as ints.
+            self.sports[row["sport_name"]] = dict(row, max_teams=int(row["max_teams"]),
+                                                  team_count=int(row["team_count"]))
+            return
+
+        for statistic, column in TRACKED_COLUMNS.get(table, {}).items():
+            if column in row:
+                counts = self.counts[statistic]
+                counts[row[column]] = counts.get(row[column], 0) + 1
+
+    def add_rows(self, table: str, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self.add_row(table, row)
+
+    def unique(self, statistic: str) -> List[Any]:
+        return [value for value, count in self.counts[statistic].items() if count > 0]
+
+    def full_teams(self) -> List[Dict[str, Any]]:
+        full_teams = []
+        for sport in self.sports.values():
+            if int(sport["max_teams"]) == int(sport["team_count"]):
+                full_teams.append(dict(sport, max_teams=int(sport["max_teams"]), team_count=int(sport["team_count"])))
+        return full_teams
+
+    def to_items(self) -> List[Dict[str, Any]]:
+        items = [
+            {"key": item_key(statistic, value), "statistic": statistic, "value": value, "count": count}
+            for statistic, counts in self.counts.items() for value, count in counts.items() if count > 0
+        ]
+        items.extend(
+            {"key": item_key(SPORTS, sport), "statistic": SPORTS, "value": sport, "row": row}
+            for sport, row in self.sports.items()
+        )
+        return items
+
+    def to_response(self) -> Dict[str, Any]:
+        response = {
+            "unique_main_universities": self.unique("main_universities"),
+            "unique_player_universities": self.unique("player_universities"),
+            "unique_players": self.unique("players"),
+            "full_teams": self.full_teams()
+        }
+
+        response["num_unique_main_universities"] = len(response["unique_main_universities"])
+        response["num_unique_player_universities"] = len(response["unique_player_universities"])
+        response["num_unique_player"] = len(response["unique_players"])
+        return response
+
+
+def record_actions(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The TransactWriteItems actions that apply one stream record: -1 for each tracked value the row no longer
+    carries, +1 for each it now carries, and the sport's row replaced or removed."""
+    table = source_table(record)
+    images = record.get("dynamodb", {})
+    old = deserialize(images.get("OldImage", {}))
+    new = deserialize(images.get("NewImage", {})) if record["eventName"] != "REMOVE" else {}
+
+    if table == SPORT_COUNT_TABLE:
+        sport = (new or old or deserialize(images.get("Keys", {}))).get("sport_name")
+        key = serialize({"key": item_key(SPORTS, sport)})
+        if new:
+            item = {"key": item_key(SPORTS, sport), "statistic": SPORTS, "value": sport, "row": new}
+            return [{"Put": {"TableName": STATISTICS_TABLE, "Item": serialize(item)}}]
+        return [{"Delete": {"TableName": STATISTICS_TABLE, "Key": key}}]
+
+    actions = []
+    for statistic, column in TRACKED_COLUMNS.get(table, {}).items():
+        if old.get(column, _MISSING) == new.get(column, _MISSING):
+            continue
+        changes = [(old[column], -1)] if column in old else []
+        changes += [(new[column], 1)] if column in new else []
+        for value, delta in changes:
+            actions.append({"Update": {
+                "TableName": STATISTICS_TABLE,
+                "Key": serialize({"key": item_key(statistic, value)}),
+                "UpdateExpression": "SET #s = :s, #v = :v ADD #c :d",
+                "ExpressionAttributeNames": {"#s": "statistic", "#v": "value", "#c": "count"},
+                "ExpressionAttributeValues": serialize({":s": statistic, ":v": value, ":d": delta})
+            }})
+    return actions
+
+
+class StatisticsStore:
+    """Reads and maintains the statistics items through the low-level client."""
+
+    def __init__(self, client=None):
+        self._client = client if client is not None else dynamodb_client()
+
+    def load(self) -> Optional[StatisticsAggregate]:
+        """The stored statistics, or None until `rebuild` has built them."""
+        items = ParallelScanner(self._client).all(STATISTICS_TABLE, total_segments=1)
+        if not any(item["key"] == BUILT_KEY for item in items):
+            return None
+        return StatisticsAggregate.from_items(items)
+
+    def apply_records(self, records: List[Dict[str, Any]]) -> int:
+        """Applies each record in its own transaction, returning how many changed anything. The record's eventID is
+        the transaction's ClientRequestToken, so when Lambda retries a batch within DynamoDB's ten minute idempotency
+        window, records that were already applied are not counted twice."""
+        applied = 0
+        for record in records:
+            actions = record_actions(record)
+            if actions:
+                self._client.transact_write_items(TransactItems=actions, ClientRequestToken=record["eventID"][:36])
+                applied += 1
+        return applied
+
+    def rebuild(self, aggregate: StatisticsAggregate) -> Dict[str, int]:
+        """Replaces the stored statistics with `aggregate`. Readers fall back to a full scan until it has finished."""
+        self._client.delete_item(TableName=STATISTICS_TABLE, Key=serialize({"key": BUILT_KEY}))
+
+        items = aggregate.to_items()
+        current = set(item["key"] for item in items)
+        writes = BatchWriter(self._client)
+        for item in items:
+            writes.put(STATISTICS_TABLE, item)
+        stored = ParallelScanner(self._client).all(
+            STATISTICS_TABLE, total_segments=1, ProjectionExpression="#k, #s",
+            ExpressionAttributeNames={"#k": "key", "#s": "statistic"}
+        )
+        for item in stored:
+            if "statistic" in item and item["key"] not in current:
+                writes.delete(STATISTICS_TABLE, {"key": item["key"]})
+        report = writes.flush()
+
+        self._client.put_item(TableName=STATISTICS_TABLE, Item=serialize({"key": BUILT_KEY, "time": time.time()}))
+        return report
@@ -0,0 +1,733 @@
+"""In-memory stand-in for DynamoDB, S3 presigning and the DynamoDBInterface helper, so every handler in app.py can
+run without AWS (set DYNAMODB_BACKEND=memory, or call `install()` before invoking handlers).
+
+Only the behaviour the handlers rely on is implemented: key and GSI equality lookups backed by hash indexes,
+paginated and segmented scans, and the condition/update/filter/projection expressions the app issues.
+"""
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Tuple
+
+from instrumentation import record_call
+from query_cache import matches_filter
+
+# table -> (partition key, attributes with a GSI on them). These tables are not defined in template.yaml, so this is
+# an assumption about the deployed ones: each GSI is taken to be named "<attribute>-index" and keyed on that attribute
+# alone, and describe_table reports them that way. QueryCache and query_planner look index names up through
+# describe_table, so only this table has to change if a deployed index differs.
+TABLES = {
+    "SamaggiGamesPlayers": ("player_uuid", ["team_university", "player_university", "sport", "name",
+                                            "team_university_sport", "player_university_sport"]),
+    "SamaggiGamesTeams": ("team_uuid", ["university", "team_university", "sport",
+                                        "team_university_sport", "university_sport"]),
+    "SamaggiGamesSportCount": ("sport_name", []),
+    "SamaggiGamesDisqualifications": ("key", []),
+    "SamaggiGamesAddress": ("code", []),
+    "SamaggiGamesPayment": ("payment-id", ["payment-verification"]),
+    "SamaggiGamesPaymentCodes": ("payment-verification", []),
+    "SamaggiGamesSpectator": ("spectator-id", []),
+    "SamaggiGamesStatistics": ("key", []),
+    "SamaggiGamesMigrations": ("migration", []),
+}
+
+# DynamoDB stops a Scan page at 1 MB; a fixed item count keeps pagination exercised locally.
+PAGE_ITEMS = 1000
+_MISSING = object()
+
+
+class LocalClientError(Exception):
+
+    def __init__(self, code: str, message: str = "", reasons: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(f"{code}: {message}")
+        self.response = {"Error": {"Code": code, "Message": message}}
+        if reasons is not None:
+            self.response["CancellationReasons"] = reasons
+
+
+class ConditionalCheckFailedException(LocalClientError):
+    def __init__(self, message: str = "The conditional request failed", item: Optional[Dict[str, Any]] = None):
+        super().__init__("ConditionalCheckFailedException", message)
+        # The current item, when the request asked for it with ReturnValuesOnConditionCheckFailure=ALL_OLD.
+        self.item = item
+
+
+class TransactionCanceledException(LocalClientError):
+    def __init__(self, reasons: List[Dict[str, Any]]):
+        super().__init__("TransactionCanceledException", "Transaction cancelled", reasons)
+
+
+class ResourceNotFoundException(LocalClientError):
+    def __init__(self, table_name: str):
+        super().__init__("ResourceNotFoundException", f"Requested resource not found: {table_name}")
+
+
+class IdempotentParameterMismatchException(LocalClientError):
+    def __init__(self):
+        super().__init__("IdempotentParameterMismatchException", "The request uses the same client token as a "
+                                                                  "previous, but non-identical request")
+
+
+class ValidationException(LocalClientError):
+    def __init__(self, message: str):
+        super().__init__("ValidationException", message)
+
+
+class _Exceptions:
+    ConditionalCheckFailedException = ConditionalCheckFailedException
+    TransactionCanceledException = TransactionCanceledException
+    IdempotentParameterMismatchException = IdempotentParameterMismatchException
+    ResourceNotFoundException = ResourceNotFoundException
+    ValidationException = ValidationException
+    ClientError = LocalClientError
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Expressions
+
+_TOKEN = re.compile(r"\s*(?:(#[\w\-]+)|(:[\w\-]+)|(<>|<=|>=|=|<|>|\+|-|\(|\)|,)|([A-Za-z_][\w\-]*))")
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None:
+            raise ValidationException(f"Unable to parse expression at: {expression[position:]}")
+        name, value, symbol, word = match.groups()
+        if name:
+            tokens.append(("name", name))
+        elif value:
+            tokens.append(("value", value))
+        elif symbol:
+            tokens.append(("symbol", symbol))
+        else:
+            tokens.append(("word", word))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+
+    def __init__(self, expression: str, names: Dict[str, str], values: Dict[str, Any]):
+        self._tokens = _tokenize(expression)
+        self._position = 0
+        self._names = names or {}
+        self._values = values or {}
+
+    def _peek(self, offset: int = 0) -> Optional[Tuple[str, str]]:
+        position = self._position + offset
+        return self._tokens[position] if position < len(self._tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise ValidationException("Unexpected end of expression")
+        self._position += 1
+        return token
+
+    def _expect(self, symbol: str):
+        if self._next() != ("symbol", symbol):
+            raise ValidationException(f"Expected '{symbol}'")
+
+    def _is_word(self, word: str) -> bool:
+        token = self._peek()
+        return token is not None and token[0] == "word" and token[1].upper() == word
+
+    def done(self) -> bool:
+        return self._peek() is None
+
+    def attribute(self) -> str:
+        kind, text = self._next()
+        if kind == "name":
+            return self._names[text]
+        if kind == "word":
+            return text
+        raise ValidationException(f"Expected an attribute name, got {text}")
+
+    def operand(self):
+        kind, text = self._next()
+        if kind == "value":
+            value = self._values[text]
+            term = lambda item: value
+        elif kind in ("name", "word"):
+            attribute = self._names[text] if kind == "name" else text
+            term = lambda item: item.get(attribute, _MISSING)
+        else:
+            raise ValidationException(f"Unexpected token {text}")
+
+        token = self._peek()
+        if token in (("symbol", "+"), ("symbol", "-")):
+            self._next()
+            left, right = term, self.operand()
+            sign = 1 if token[1] == "+" else -1
+
+            def arithmetic(item):
+                a, b = left(item), right(item)
+                # A missing side leaves the sum missing, which `update` reports as DynamoDB does.
+                return _MISSING if a is _MISSING or b is _MISSING else a + sign * b
+            return arithmetic
+        return term
+
+    def condition(self):
+        left = self._and()
+        while self._is_word("OR"):
+            self._next()
+            right, previous = self._and(), left
+            left = lambda item, a=previous, b=right: a(item) or b(item)
+        return left
+
+    def _and(self):
+        left = self._not()
+        while self._is_word("AND"):
+            self._next()
+            right, previous = self._not(), left
+            left = lambda item, a=previous, b=right: a(item) and b(item)
+        return left
+
+    def _not(self):
+        if self._is_word("NOT"):
+            self._next()
+            inner = self._not()
+            return lambda item: not inner(item)
+        return self._primary()
+
+    def _primary(self):
+        if self._peek() == ("symbol", "("):
+            self._next()
+            inner = self.condition()
+            self._expect(")")
+            return inner
+
+        token, following = self._peek(), self._peek(1)
+        if token[0] == "word" and following == ("symbol", "("):
+            function = self._next()[1]
+            self._expect("(")
+            attribute = self.attribute()
+            argument = None
+            if self._peek() == ("symbol", ","):
+                self._next()
+                argument = self.operand()
+            self._expect(")")
+
+            if function == "attribute_exists":
+                return lambda item: attribute in item
+            if function == "attribute_not_exists":
+                return lambda item: attribute not in item
+            if function == "begins_with":
+                return lambda item: isinstance(item.get(attribute), str) and item[attribute].startswith(argument(item))
+            raise ValidationException(f"Unsupported function {function}")
+
+        left = self.operand()
+        kind, comparator = self._next()
+        right = self.operand()
+        compare = {
+            "=": lambda a, b: a == b,
+            "<>": lambda a, b: a != b,
+            "<": lambda a, b: a < b,
+            "<=": lambda a, b: a <= b,
+            ">": lambda a, b: a > b,
+            ">=": lambda a, b: a >= b
+        }[comparator]
+
+        def evaluate(item):
+            a, b = left(item), right(item)
+            if a is _MISSING or b is _MISSING:
+                return comparator == "<>"
+            try:
+                return compare(a, b)
+            except TypeError:
+                return False
+        return evaluate
+
+    def actions(self) -> List[Tuple[str, str, Any]]:
+        """(clause, attribute, operand) for every action of SET and ADD clauses, in either order."""
+        actions = []
+        while not self.done():
+            clause = self._next()
+            if clause not in (("word", "SET"), ("word", "ADD")):
+                raise ValidationException("Only SET and ADD update expressions are supported")
+            actions.append(self._action(clause[1]))
+            while self._peek() == ("symbol", ","):
+                self._next()
+                actions.append(self._action(clause[1]))
+        return actions
+
+    def _action(self, clause: str) -> Tuple[str, str, Any]:
+        attribute = self.attribute()
+        if clause == "SET":
+            self._expect("=")
+        return clause, attribute, self.operand()
+
+
+def condition(expression: Optional[str], names: Dict[str, str] = None, values: Dict[str, Any] = None):
+    if not expression:
+        return lambda item: True
+    parser = _Parser(expression, names, values)
+    evaluate = parser.condition()
+    if not parser.done():
+        raise ValidationException(f"Unable to parse condition: {expression}")
+    return evaluate
+
+
+def update(expression: str, names: Dict[str, str] = None, values: Dict[str, Any] = None):
+    parser = _Parser(expression, names, values)
+    actions = parser.actions()
+
+    def apply(item: Dict[str, Any]) -> Dict[str, Any]:
+        updated = dict(item)
+        for clause, attribute, operand in actions:
+            value = operand(item)
+            if value is _MISSING:
+                raise ValidationException("The provided expression refers to an attribute that does not exist")
+            # ADD starts a missing number at zero.
+            updated[attribute] = item.get(attribute, 0) + value if clause == "ADD" else value
+        return updated
+    return apply
+
+
+def projection(expression: Optional[str], names: Dict[str, str] = None) -> Optional[List[str]]:
+    if not expression:
+        return None
+    names = names or {}
+    return [names.get(part.strip(), part.strip()) for part in expression.split(",")]
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Storage
+
+def _number(value: Any) -> Any:
+    # DynamoDB hands numbers back as Decimals whichever API wrote them.
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: _number(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_number(item) for item in value]
+    return value
+
+
+class LocalTableStore:
+    """Items keyed by partition key plus one hash index per GSI attribute."""
+
+    def __init__(self, name: str, hash_key: str, indexed: List[str]):
+        self.name = name
+        self.hash_key = hash_key
+        self.items: Dict[Any, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Dict[Any, Dict[Any, Dict[str, Any]]]] = {attribute: {} for attribute in indexed}
+
+    def _unindex(self, item: Dict[str, Any]):
+        for attribute, index in self.indexes.items():
+            if attribute in item:
+                bucket = index.get(item[attribute])
+                if bucket is not None:
+                    bucket.pop(item[self.hash_key], None)
+                    if not bucket:
+                        del index[item[attribute]]
+
+    def put(self, item: Dict[str, Any]):
+        if self.hash_key not in item:
+            raise ValidationException(f"Missing the key {self.hash_key} in the item")
+        item = _number(item)
+        key = item[self.hash_key]
+        if key in self.items:
+            self._unindex(self.items[key])
+        self.items[key] = item
+        for attribute, index in self.indexes.items():
+            if attribute in item:
+                index.setdefault(item[attribute], {})[key] = item
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        return self.items.get(key)
+
+    def add_index(self, attribute: str):
+        index = self.indexes.setdefault(attribute, {})
+        for key, item in self.items.items():
+            if attribute in item:
+                index.setdefault(item[attribute], {})[key] = item
+
+    def delete(self, key: Any):
+        item = self.items.pop(key, None)
+        if item is not None:
+            self._unindex(item)
+
+    def lookup(self, attribute: str, value: Any) -> List[Dict[str, Any]]:
+        if attribute == self.hash_key:
+            item = self.items.get(value)
+            return [item] if item is not None else []
+        if attribute in self.indexes:
+            return list(self.indexes[attribute].get(value, {}).values())
+        # The helper library would fail on a missing index; fall back rather than hide the query entirely.
+        return [item for item in self.items.values() if item.get(attribute) == value]
+
+
+class LocalDatabase:
+    """Holds every local table. `operations` counts calls per operation name, across all APIs."""
+
+    def __init__(self, tables: Dict[str, Tuple[str, List[str]]] = None):
+        self.lock = threading.RLock()
+        self.stores: Dict[str, LocalTableStore] = {}
+        self.operations: Counter = Counter()
+        # ClientRequestToken -> the TransactItems it committed
+        self.transactions: Dict[str, List[Dict[str, Any]]] = {}
+        for name, (hash_key, indexed) in (tables or TABLES).items():
+            self.create_table(name, hash_key, indexed)
+
+    def create_table(self, name: str, hash_key: str, indexed: List[str] = None) -> LocalTableStore:
+        self.stores[name] = LocalTableStore(name, hash_key, list(indexed or []))
+        return self.stores[name]
+
+    def store(self, name: str) -> LocalTableStore:
+        if name not in self.stores:
+            raise ResourceNotFoundException(name)
+        return self.stores[name]
+
+    @contextmanager
+    def operation(self, name: str, service: str = "dynamodb"):
+        """Runs one API call under the database lock, counting it and reporting it to the active invocation."""
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                self.operations[name] += 1
+                yield
+        finally:
+            # Reported under the API's own name, e.g. get_item -> GetItem, to match calls made through boto3.
+            operation = "".join(part.title() for part in name.split("_"))
+            record_call(service, operation, (time.perf_counter() - start) * 1000)
+
+    def reset_counts(self):
+        self.operations.clear()
+
+    def load(self, name: str, items: List[Dict[str, Any]]):
+        with self.lock:
+            for item in items:
+                self.store(name).put(item)
+
+    # DynamoDBInterface.DynamoDB.Database API
+    def table(self, name: str) -> "LocalTable":
+        return LocalTable(self, self.store(name))
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# DynamoDBInterface helper API
+
+class LocalResponse(list):
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        super().__init__(dict(item) for item in items)
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def exists(self) -> bool:
+        return len(self) > 0
+
+    def length(self) -> int:
+        return len(self)
+
+    def filter(self, key: str, value: Any, filter_type=None) -> "LocalResponse":
+        return LocalResponse([item for item in self if matches_filter(item, key, value, filter_type)])
+
+    def get_where(self, key: str, value: Any) -> Dict[str, Any]:
+        return next((item for item in self if item.get(key) == value), {})
+
+    def unique(self, key: str) -> List[Any]:
+        return list(dict.fromkeys(item[key] for item in self if key in item))
+
+    def count_occurrence(self, key: str) -> Dict[Any, int]:
+        return dict(Counter(item[key] for item in self if key in item))
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return super().__getitem__(0)[item]
+        return super().__getitem__(item)
+
+
+class LocalTable:
+
+    def __init__(self, database: LocalDatabase, store: LocalTableStore):
+        self._database = database
+        self._store = store
+
+    def _key(self, key: str, equals: Any) -> Tuple[str, Any]:
+        # Called either as (column, equals=value) or with just the partition key value.
+        return (self._store.hash_key, key) if equals is None else (key, equals)
+
+    def scan(self) -> LocalResponse:
+        with self._database.operation("scan"):
+            return LocalResponse(self._store.items.values())
+
+    def get(self, key: str, equals: Any = None, is_secondary_index: bool = False,
+            consistent_read: bool = False) -> LocalResponse:
+        attribute, value = self._key(key, equals)
+        with self._database.operation("query" if is_secondary_index else "get_item"):
+            return LocalResponse(self._store.lookup(attribute, value))
+
+    def there_exists(self, value: Any, at_column: str = None) -> bool:
+        with self._database.operation("get_item"):
+            return len(self._store.lookup(at_column or self._store.hash_key, value)) > 0
+
+    def write(self, item: Dict[str, Any]):
+        with self._database.operation("put_item"):
+            self._store.put(item)
+
+    def update(self, key: str, equals: Any = None, data_to_update: Dict[str, Any] = None):
+        attribute, value = self._key(key, equals)
+        with self._database.operation("update_item"):
+            for item in self._store.lookup(attribute, value):
+                self._store.put(dict(item, **(data_to_update or {})))
+
+    def _add(self, key: str, equals: Any, value_key: str, by: int):
+        attribute, value = self._key(key, equals)
+        with self._database.operation("update_item"):
+            for item in self._store.lookup(attribute, value):
+                self._store.put(dict(item, **{value_key: item.get(value_key, 0) + by}))
+
+    def increment(self, key: str, equals: Any = None, value_key: str = None, by: int = 1):
+        self._add(key, equals, value_key, by)
+
+    def decrement(self, key: str, equals: Any = None, value_key: str = None, by: int = 1):
+        self._add(key, equals, value_key, -by)
+
+    def delete(self, key: str, equals: Any = None):
+        attribute, value = self._key(key, equals)
+        with self._database.operation("delete_item"):
+            for item in self._store.lookup(attribute, value):
+                self._store.delete(item[self._store.hash_key])
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# boto3 client / resource API
+
+def _serialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    from batch_writer import serialize
+    return serialize(item)
+
+
+def _deserialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    from scanner import deserialize
+    return deserialize(item)
+
+
+class LocalDynamoDBClient:
+
+    exceptions = _Exceptions
+
+    def __init__(self, database: LocalDatabase):
+        self._database = database
+
+    def describe_table(self, TableName: str) -> Dict[str, Any]:
+        with self._database.operation("describe_table"):
+            store = self._database.store(TableName)
+        return {
+            "Table": {
+                "TableName": TableName,
+                "KeySchema": [{"AttributeName": store.hash_key, "KeyType": "HASH"}],
+                "GlobalSecondaryIndexes": [
+                    {
+                        "IndexName": f"{attribute}-index",
+                        "KeySchema": [{"AttributeName": attribute, "KeyType": "HASH"}],
+                        "Projection": {"ProjectionType": "ALL"}
+                    }
+                    for attribute in store.indexes
+                ],
+                "TableStatus": "ACTIVE",
+                "BillingModeSummary": {"BillingMode": "PAY_PER_REQUEST"},
+                "ItemCount": len(store.items),
+                "TableSizeBytes": 256 * len(store.items)
+            }
+        }
+
+    def update_table(self, TableName: str, GlobalSecondaryIndexUpdates: List[Dict[str, Any]] = (),
+                     **_) -> Dict[str, Any]:
+        # Indexes are built immediately, so they are ACTIVE by the next describe_table.
+        with self._database.operation("update_table"):
+            store = self._database.store(TableName)
+            for update in GlobalSecondaryIndexUpdates:
+                if "Create" in update:
+                    key_schema = update["Create"]["KeySchema"]
+                    store.add_index(next(key["AttributeName"] for key in key_schema if key["KeyType"] == "HASH"))
+        return {"TableDescription": self.describe_table(TableName)["Table"]}
+
+    @staticmethod
+    def _values(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return _deserialize(kwargs.get("ExpressionAttributeValues", {}))
+
+    def _read(self, store: LocalTableStore, candidates: List[Dict[str, Any]],
+              kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        names = kwargs.get("ExpressionAttributeNames", {})
+        values = self._values(kwargs)
+        keep = condition(kwargs.get("FilterExpression"), names, values)
+        fields = projection(kwargs.get("ProjectionExpression"), names)
+        limit = kwargs.get("Limit", PAGE_ITEMS)
+
+        start = 0
+        if "ExclusiveStartKey" in kwargs:
+            last_key = _deserialize(kwargs["ExclusiveStartKey"])[store.hash_key]
+            keys = [item[store.hash_key] for item in candidates]
+            start = keys.index(last_key) + 1 if last_key in keys else len(keys)
+
+        evaluated = candidates[start:start + limit]
+        page = [item for item in evaluated if keep(item)]
+        if fields is not None:
+            page = [{field: item[field] for field in fields if field in item} for item in page]
+
+        response = {
+            "Items": [_serialize(item) for item in page],
+            "Count": len(page),
+            "ScannedCount": len(evaluated)
+        }
+        if start + limit < len(candidates):
+            response["LastEvaluatedKey"] = _serialize({store.hash_key: evaluated[-1][store.hash_key]})
+        return response
+
+    def scan(self, TableName: str, **kwargs) -> Dict[str, Any]:
+        with self._database.operation("scan"):
+            store = self._database.store(TableName)
+            candidates = list(store.items.values())
+            if "TotalSegments" in kwargs:
+                segment, total = kwargs["Segment"], kwargs["TotalSegments"]
+                candidates = [
+                    item for item in candidates
+                    if zlib.crc32(str(item[store.hash_key]).encode()) % total == segment
+                ]
+            return self._read(store, candidates, kwargs)
+
+    def query(self, TableName: str, KeyConditionExpression: str, **kwargs) -> Dict[str, Any]:
+        match = re.fullmatch(r"\s*(#?[\w\-]+)\s*=\s*(:[\w\-]+)\s*", KeyConditionExpression)
+        if match is None:
+            raise ValidationException("Only partition key equality is supported locally")
+        names = kwargs.get("ExpressionAttributeNames", {})
+        attribute = names.get(match.group(1), match.group(1))
+        value = self._values(kwargs)[match.group(2)]
+
+        with self._database.operation("query"):
+            store = self._database.store(TableName)
+            if "IndexName" in kwargs and kwargs["IndexName"] != f"{attribute}-index":
+                raise ValidationException(f"Index {kwargs['IndexName']} does not have {attribute} as its key")
+            return self._read(store, store.lookup(attribute, value), kwargs)
+
+    def get_item(self, TableName: str, Key: Dict[str, Any], **_) -> Dict[str, Any]:
+        with self._database.operation("get_item"):
+            store = self._database.store(TableName)
+            item = store.get(_deserialize(Key)[store.hash_key])
+            return {"Item": _serialize(item)} if item is not None else {}
+
+    def _check(self, store: LocalTableStore, key: Any, request: Dict[str, Any]):
+        current = store.get(key)
+        names = request.get("ExpressionAttributeNames", {})
+        if not condition(request.get("ConditionExpression"), names, self._values(request))(current or {}):
+            old = current if request.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD" else None
+            raise ConditionalCheckFailedException(item=old)
+
+    def _put(self, table_name: str, request: Dict[str, Any]):
+        store = self._database.store(table_name)
+        item = _deserialize(request["Item"])
+        self._check(store, item.get(store.hash_key), request)
+        return lambda: store.put(item)
+
+    def _update(self, table_name: str, request: Dict[str, Any]):
+        store = self._database.store(table_name)
+        key = _deserialize(request["Key"])[store.hash_key]
+        self._check(store, key, request)
+        updated = update(
+            request["UpdateExpression"], request.get("ExpressionAttributeNames", {}), self._values(request)
+        )(store.get(key) or {store.hash_key: key})
+        return lambda: store.put(updated)
+
+    def _delete(self, table_name: str, request: Dict[str, Any]):
+        store = self._database.store(table_name)
+        key = _deserialize(request["Key"])[store.hash_key]
+        self._check(store, key, request)
+        return lambda: store.delete(key)
+
+    def _condition_check(self, table_name: str, request: Dict[str, Any]):
+        store = self._database.store(table_name)
+        self._check(store, _deserialize(request["Key"])[store.hash_key], request)
+        return lambda: None
+
+    def put_item(self, TableName: str, **request) -> Dict[str, Any]:
+        with self._database.operation("put_item"):
+            self._put(TableName, request)()
+        return {}
+
+    def update_item(self, TableName: str, **request) -> Dict[str, Any]:
+        with self._database.operation("update_item"):
+            self._update(TableName, request)()
+        return {}
+
+    def delete_item(self, TableName: str, **request) -> Dict[str, Any]:
+        with self._database.operation("delete_item"):
+            self._delete(TableName, request)()
+        return {}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        with self._database.operation("batch_write_item"):
+            for table_name, requests in RequestItems.items():
+                for request in requests:
+                    if "PutRequest" in request:
+                        self._put(table_name, request["PutRequest"])()
+                    else:
+                        self._delete(table_name, request["DeleteRequest"])()
+        return {"UnprocessedItems": {}}
+
+    def transact_write_items(self, TransactItems: List[Dict[str, Any]],
+                             ClientRequestToken: Optional[str] = None) -> Dict[str, Any]:
+        operations = {"Put": self._put, "Update": self._update, "Delete": self._delete,
+                      "ConditionCheck": self._condition_check}
+
+        with self._database.operation("transact_write_items"):
+            if len(TransactItems) > 100:
+                raise ValidationException("Member must have length less than or equal to 100")
+            # A repeated token is a no-op, as within DynamoDB's idempotency window (which never expires here).
+            if ClientRequestToken is not None:
+                if ClientRequestToken in self._database.transactions:
+                    if self._database.transactions[ClientRequestToken] != TransactItems:
+                        raise IdempotentParameterMismatchException()
+                    return {}
+            commits, reasons = [], []
+            for transact_item in TransactItems:
+                (operation, request), = transact_item.items()
+                try:
+                    commits.append(operations[operation](request["TableName"], request))
+                    reasons.append({"Code": "None"})
+                except ConditionalCheckFailedException as e:
+                    reasons.append({"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+                    if e.item is not None:
+                        reasons[-1]["Item"] = _serialize(e.item)
+
+            if any(reason["Code"] != "None" for reason in reasons):
+                raise TransactionCanceledException(reasons)
+            for commit in commits:
+                commit()
+            if ClientRequestToken is not None:
+                self._database.transactions[ClientRequestToken] = TransactItems
+        return {}
+
+
+class LocalS3Client:
+
+    def __init__(self, database: LocalDatabase):
+        self._database = database
+
+    def generate_presigned_url(self, ClientMethod: str, Params: Dict[str, Any], ExpiresIn: int = 3600) -> str:
+        with self._database.operation("generate_presigned_url", service="s3"):
+            return f"http://localhost/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+
+def install(database: LocalDatabase = None) -> LocalDatabase:
+    """Points aws_clients at an in-memory database and returns it; assign it to `app.db` (or set
+    DYNAMODB_BACKEND=memory before importing app) so the helper-library calls use it too."""
+    import aws_clients
+
+    database = database if database is not None else LocalDatabase()
+    client = LocalDynamoDBClient(database)
+    aws_clients.override(dynamodb_client=client, s3_client=LocalS3Client(database))
+    return database
@@ -0,0 +1,98 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Optional
+
+import requests
+
+MAX_MESSAGE_LENGTH = 2000  # Discord rejects longer message content
+MAX_ATTEMPTS = 5
+BASE_DELAY = 0.5
+MAX_DELAY = 10.0
+TIMEOUT = 5
+
+
+def split_message(message: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Splits on line breaks where possible so each chunk stays readable; single lines longer than the limit are
+    cut into limit-sized pieces."""
+    chunks = []
+    current = ""
+    for line in message.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+
+        candidate = line if not current else current + "\n" + line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class DiscordNotifier:
+    """Posts to a Discord webhook from a single background thread, reusing one HTTP session. Messages are delivered
+    in the order they were sent; callers that must not return before delivery wait on the returned future. A
+    `deadline` (a time.monotonic() value) bounds every request timeout and retry delay, so delivery gives up in time
+    for the caller to return."""
+
+    def __init__(self, url: str, session: requests.Session = None):
+        self._url = url
+        self._session = session if session is not None else requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.posted = 0
+        self.retried = 0
+
+    def _post(self, content: str, deadline: Optional[float] = None):
+        for attempt in range(MAX_ATTEMPTS):
+            timeout = TIMEOUT if deadline is None else min(TIMEOUT, deadline - time.monotonic())
+            if timeout <= 0:
+                raise RuntimeError("Ran out of time to deliver message to Discord after {} attempt(s).".format(attempt))
+
+            delay = min(MAX_DELAY, BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1)
+            try:
+                response = self._session.post(self._url, json={"content": content}, timeout=timeout)
+            except requests.RequestException:
+                response = None
+
+            if response is not None and response.status_code < 300:
+                self.posted += 1
+                return
+
+            if response is not None and response.status_code == 429:
+                try:
+                    delay = float(response.json().get("retry_after", delay))
+                except ValueError:
+                    delay = float(response.headers.get("Retry-After", delay))
+            elif response is not None and response.status_code < 500:
+                raise RuntimeError("Discord rejected the message ({}): {}".format(response.status_code, response.text))
+
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise RuntimeError("Ran out of time to deliver message to Discord after {} attempt(s).".format(
+                    attempt + 1
+                ))
+            if attempt < MAX_ATTEMPTS - 1:
+                self.retried += 1
+                time.sleep(delay)
+
+        raise RuntimeError("Unable to deliver message to Discord after {} attempts.".format(MAX_ATTEMPTS))
+
+    def _deliver(self, message: str, deadline: Optional[float] = None):
+        chunks = split_message(message)
+        for i, chunk in enumerate(chunks):
+            try:
+                self._post(chunk, deadline)
+            except Exception as e:
+                # Keep the undelivered part of the report in the function logs rather than losing it.
+                print("Discord delivery failed: {}\n{}".format(e, "\n".join(chunks[i:])))
+                raise
+
+    def send(self, message: str, deadline: Optional[float] = None) -> Future:
+        return self._executor.submit(self._deliver, message, deadline)
@@ -0,0 +1,73 @@
+import base64
+import gzip
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+# Bodies smaller than this are not worth the CPU time to compress.
+MIN_GZIP_BYTES = 1024
+
+
+def encode_token(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, separators=(",", ":")).encode()).decode()
+
+
+def decode_token(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Raises ValueError for tokens that were not produced by encode_token."""
+    if not token:
+        return None
+    key = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    if not isinstance(key, dict):
+        raise ValueError("next token is not a table key")
+    return key
+
+
+def page_limit(page_size: Any) -> int:
+    limit = int(page_size)
+    if limit < 1:
+        raise ValueError("page size must be at least 1")
+    return limit
+
+
+def projection(fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Scan/Query keyword arguments that only return `fields`. Every name is aliased so reserved words such as
+    `name` or `time` can be projected. Raises ValueError unless every field is an attribute name."""
+    if not fields:
+        return {}
+    if not all(isinstance(field, str) and field for field in fields):
+        raise ValueError("fields must be attribute names")
+    names = {f"#p{i}": field for i, field in enumerate(fields)}
+    return {
+        "ProjectionExpression": ", ".join(names.keys()),
+        "ExpressionAttributeNames": names
+    }
+
+
+def scan_page(scanner, table_name: str, page_size: int, token: Optional[str] = None,
+              **scan_kwargs) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    items, last_evaluated_key = scanner.page(table_name, page_size, decode_token(token), **scan_kwargs)
+    return items, encode_token(last_evaluated_key)
+
+
+def accepts_gzip(event: Dict[str, Any]) -> bool:
+    # Browsers send Accept-Encoding: gzip on every request, but API Gateway only turns the base64 body back into
+    # bytes when Accept matches one of the BinaryMediaTypes, so clients opt in with Accept: application/gzip.
+    headers = (event or {}).get("headers") or {}
+    for header, value in headers.items():
+        if header.lower() == "accept":
+            return "application/gzip" in value
+    return False
+
+
+def gzip_response(response: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    if not accepts_gzip(event) or len(response["body"]) < MIN_GZIP_BYTES:
+        return response
+
+    response["body"] = base64.b64encode(gzip.compress(response["body"].encode(), compresslevel=5)).decode()
+    response["isBase64Encoded"] = True
+    response.setdefault("headers", {}).update({
+        "Content-Encoding": "gzip",
+        "Content-Type": "application/json"
+    })
+    return response
@@ -0,0 +1,62 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Tuple
+
+IMAGE_BUCKET = "samaggi-games-id"
+EXPIRES_IN = 21600
+# Hand out a cached URL only while it stays valid for at least this long after the response is sent.
+REFRESH_MARGIN = 1800
+
+
+class PresignedUrlCache:
+    """Keeps presigned GET URLs per object key for the lifetime of the container, re-signing a key only once its
+    URL is within REFRESH_MARGIN seconds of expiring."""
+
+    def __init__(self, bucket: str = IMAGE_BUCKET, expires_in: int = EXPIRES_IN, refresh_margin: int = REFRESH_MARGIN,
+                 max_workers: int = 8):
+        self._bucket = bucket
+        self._expires_in = expires_in
+        self._refresh_margin = refresh_margin
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self._urls: Dict[str, Tuple[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _sign(self, s3, key: str) -> Tuple[str, float]:
+        expires_at = time.time() + self._expires_in
+        url = s3.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={
+                "Bucket": self._bucket,
+                "Key": key
+            },
+            ExpiresIn=self._expires_in
+        )
+        return url, expires_at
+
+    def urls_for(self, s3, keys: Iterable[str]) -> Dict[str, str]:
+        now = time.time()
+        keys = set(key for key in keys if key != "")
+
+        with self._lock:
+            fresh = {
+                key: self._urls[key][0] for key in keys
+                if key in self._urls and self._urls[key][1] - now > self._refresh_margin
+            }
+            missing = [key for key in keys if key not in fresh]
+            self.hits += len(fresh)
+            self.misses += len(missing)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                signed = dict(zip(missing, executor.map(lambda key: self._sign(s3, key), missing)))
+            with self._lock:
+                self._urls.update(signed)
+            fresh.update((key, url) for key, (url, _) in signed.items())
+
+        return fresh
+
+
+image_links = PresignedUrlCache()
@@ -0,0 +1,92 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Tuple
+
+from aws_clients import dynamodb_client
+from batch_writer import serialize
+from query_planner import table_schema
+from scanner import deserialize
+
+# Shared by every invocation in the container; only the cache itself is request scoped.
+_executor = ThreadPoolExecutor(max_workers=8)
+
+
+def matches_filter(item: Dict[str, Any], key: str, value: Any, filter_type=None) -> bool:
+    """`filter_type` is the helper library's DynamoDB.FilterType (EQUAL when left out). Members are matched by name,
+    so results can be filtered where the library is not installed."""
+    if filter_type is not None and getattr(filter_type, "name", str(filter_type)).upper() == "NOT_EQUAL":
+        return item.get(key) != value
+    return item.get(key) == value
+
+
+class QueryResult(list):
+    """Query rows with the helpers handlers use on the helper library's responses."""
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def exists(self) -> bool:
+        return len(self) > 0
+
+    def length(self) -> int:
+        return len(self)
+
+    def count_occurrence(self, key: str) -> Dict[Any, int]:
+        return dict(Counter(item[key] for item in self if key in item))
+
+    def filter(self, key: str, value: Any, filter_type=None) -> "QueryResult":
+        return QueryResult(item for item in self if matches_filter(item, key, value, filter_type))
+
+
+class QueryCache:
+    """Memoises equality queries for the lifetime of one request, so identical queries reach DynamoDB once.
+    In-flight queries are shared too, which lets handlers prefetch independent queries in parallel and collect
+    them later with `get`. Queries run on the low-level client because, unlike the helper library's boto3
+    resource, it is safe to share between the worker threads."""
+
+    def __init__(self, client=None):
+        self._client = client if client is not None else dynamodb_client()
+        self._lock = threading.Lock()
+        self._futures: Dict[Tuple, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _query(self, table_name: str, key: str, equals: Any, is_secondary_index: bool) -> QueryResult:
+        kwargs = {
+            "TableName": table_name,
+            "KeyConditionExpression": "#k = :k",
+            "ExpressionAttributeNames": {"#k": key},
+            "ExpressionAttributeValues": serialize({":k": equals})
+        }
+        if is_secondary_index:
+            indexes = table_schema(self._client, table_name)["indexes"]
+            if key not in indexes:  # the schema may have been cached before the index was created
+                indexes = table_schema(self._client, table_name, refresh=True)["indexes"]
+            if key not in indexes:
+                raise ValueError(f"{table_name} has no index on {key}")
+            kwargs["IndexName"] = indexes[key]
+
+        items = QueryResult()
+        while True:
+            page = self._client.query(**kwargs)
+            items.extend(deserialize(item) for item in page.get("Items", []))
+            if "LastEvaluatedKey" not in page:
+                return items
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+    def _submit(self, table_name: str, key: str, equals: Any, is_secondary_index: bool) -> Future:
+        cache_key = (table_name, key, equals, is_secondary_index)
+        with self._lock:
+            if cache_key in self._futures:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._futures[cache_key] = _executor.submit(self._query, table_name, key, equals, is_secondary_index)
+            return self._futures[cache_key]
+
+    def prefetch(self, table_name: str, key: str, equals: Any, is_secondary_index: bool = True):
+        self._submit(table_name, key, equals, is_secondary_index)
+
+    def get(self, table_name: str, key: str, equals: Any, is_secondary_index: bool = True) -> QueryResult:
+        return self._submit(table_name, key, equals, is_secondary_index).result()
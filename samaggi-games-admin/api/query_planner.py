@@ -0,0 +1,155 @@
+import threading
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from batch_writer import serialize
+from scanner import ParallelScanner, deserialize
+
+_schemas: Dict[str, Dict[str, Any]] = {}
+_schemas_lock = threading.Lock()
+
+
+def check_filters(filters: List[Any]):
+    """Raises ValueError unless every filter is an equality filter `{"key": <attribute name>, "value": ...}`."""
+    for f in filters:
+        if not isinstance(f, dict) or not isinstance(f.get("key"), str) or not f["key"] or "value" not in f:
+            raise ValueError(f"filter {f!r} is not a {{key, value}} object")
+
+
+def table_schema(client, table_name: str, refresh: bool = False) -> Dict[str, Any]:
+    """Key attributes of the table and of every GSI that projects all attributes, cached per container unless
+    `refresh` asks to describe the table again."""
+    if refresh or table_name not in _schemas:
+        table = client.describe_table(TableName=table_name)["Table"]
+
+        def key(key_schema, key_type):
+            return next((key["AttributeName"] for key in key_schema if key["KeyType"] == key_type), None)
+
+        indexes, index_ranges = {}, {}
+        for index in table.get("GlobalSecondaryIndexes", []):
+            # Querying a KEYS_ONLY/INCLUDE index would silently drop columns from the response.
+            if index["Projection"]["ProjectionType"] == "ALL":
+                indexes.setdefault(key(index["KeySchema"], "HASH"), index["IndexName"])
+                index_ranges[index["IndexName"]] = key(index["KeySchema"], "RANGE")
+
+        with _schemas_lock:
+            _schemas[table_name] = {
+                "hash_key": key(table["KeySchema"], "HASH"),
+                "range_key": key(table["KeySchema"], "RANGE"),
+                "indexes": indexes,
+                "index_ranges": index_ranges
+            }
+    return _schemas[table_name]
+
+
+class QueryPlan:
+
+    def __init__(self, table_name: str, filters: List[Dict[str, Any]], key_filter: Optional[Dict[str, Any]] = None,
+                 index_name: Optional[str] = None, sort_filter: Optional[Dict[str, Any]] = None):
+        self.table_name = table_name
+        self.key_filter = key_filter
+        self.sort_filter = sort_filter
+        self.index_name = index_name
+        self.filters = filters
+
+    @property
+    def strategy(self) -> str:
+        return "scan" if self.key_filter is None else "query"
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "table": self.table_name,
+            "index": self.index_name,
+            "key": self.key_filter["key"] if self.key_filter is not None else None,
+            "sort_key": self.sort_filter["key"] if self.sort_filter is not None else None,
+            "filters": [f["key"] for f in self.filters]
+        }
+
+    def request(self, **extra) -> Dict[str, Any]:
+        """Scan/Query keyword arguments for this plan, merged with `extra` (e.g. a projection)."""
+        kwargs = dict(extra, TableName=self.table_name)
+        names = dict(extra.get("ExpressionAttributeNames", {}))
+        values = {}
+
+        if self.key_filter is not None:
+            names["#k"] = self.key_filter["key"]
+            values[":k"] = self.key_filter["value"]
+            kwargs["KeyConditionExpression"] = "#k = :k"
+            if self.sort_filter is not None:
+                names["#s"] = self.sort_filter["key"]
+                values[":s"] = self.sort_filter["value"]
+                kwargs["KeyConditionExpression"] += " AND #s = :s"
+            if self.index_name is not None:
+                kwargs["IndexName"] = self.index_name
+
+        conditions = []
+        for i, f in enumerate(self.filters):
+            names[f"#f{i}"] = f["key"]
+            values[f":f{i}"] = f["value"]
+            conditions.append(f"#f{i} = :f{i}")
+        if conditions:
+            kwargs["FilterExpression"] = " AND ".join(conditions)
+
+        if names:
+            kwargs["ExpressionAttributeNames"] = names
+        if values:
+            kwargs["ExpressionAttributeValues"] = serialize(values)
+        return kwargs
+
+
+def _query_plan(table_name: str, filters: List[Dict[str, Any]], key_filter: Dict[str, Any], range_key: Optional[str],
+                key_attributes: Set[str], index_name: Optional[str] = None) -> Optional[QueryPlan]:
+    rest = [f for f in filters if f is not key_filter]
+    sort_filter = next((f for f in rest if range_key is not None and f["key"] == range_key), None)
+    rest = [f for f in rest if f is not sort_filter]
+    # DynamoDB rejects key attributes in a Query's FilterExpression, e.g. a second filter on the partition key.
+    if any(f["key"] in key_attributes for f in rest):
+        return None
+    return QueryPlan(table_name, rest, key_filter=key_filter, index_name=index_name, sort_filter=sort_filter)
+
+
+def plan(client, table_name: str, filters: List[Dict[str, Any]]) -> QueryPlan:
+    """Prefers a Query on the base table, then on a GSI, keyed by one of the equality filters (plus a sort key
+    equality when there is one); everything else becomes a FilterExpression. Falls back to a Scan when the
+    remaining filters would still touch key attributes, which only a Scan may filter on."""
+    schema = table_schema(client, table_name)
+    table_keys = {schema["hash_key"], schema["range_key"]} - {None}
+
+    for f in filters:
+        if f["key"] == schema["hash_key"]:
+            query_plan = _query_plan(table_name, filters, f, schema["range_key"], table_keys)
+            if query_plan is not None:
+                return query_plan
+    for f in filters:
+        if f["key"] in schema["indexes"]:
+            index_name = schema["indexes"][f["key"]]
+            range_key = schema["index_ranges"][index_name]
+            query_plan = _query_plan(table_name, filters, f, range_key, table_keys | {f["key"], range_key} - {None},
+                                     index_name)
+            if query_plan is not None:
+                return query_plan
+    return QueryPlan(table_name, list(filters))
+
+
+def execute(client, query_plan: QueryPlan, limit: Optional[int] = None,
+            exclusive_start_key: Optional[Dict[str, Any]] = None,
+            **extra) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Runs the plan, reading a single page of `limit` items or, without a limit, every page."""
+    kwargs = query_plan.request(**extra)
+    if query_plan.strategy == "scan" and limit is None and not exclusive_start_key:
+        return ParallelScanner(client).all(kwargs.pop("TableName"), **kwargs), None
+
+    operation = client.query if query_plan.strategy == "query" else client.scan
+    if limit is not None:
+        kwargs["Limit"] = limit
+
+    items = []
+    while True:
+        if exclusive_start_key:
+            kwargs["ExclusiveStartKey"] = exclusive_start_key
+        page = operation(**kwargs)
+        items.extend(deserialize(item) for item in page.get("Items", []))
+        exclusive_start_key = page.get("LastEvaluatedKey")
+
+        if limit is not None or exclusive_start_key is None:
+            return items, exclusive_start_key
@@ -0,0 +1,95 @@
+import base64
+import json
+from typing import Dict, Any, Optional, Tuple
+
+from instrumentation import phase
+from responses import respond
+
+NUMBER = (int, float)
+_MISSING = object()
+
+
+class OptionalField:
+    """Marks a field that may be left out of the request body."""
+
+    def __init__(self, types, default: Any = None):
+        self.types = types
+        self.default = default
+
+
+def optional(types, default: Any = None) -> OptionalField:
+    return OptionalField(types, default)
+
+
+def nullable(types) -> Tuple:
+    """A required field that may also be null, for values the handler stores as given."""
+    return _as_tuple(types) + (type(None),)
+
+
+def normalise(body: str) -> str:
+    # Raw line breaks have always been dropped from bodies, including inside strings (escaped "\n" is kept). Most
+    # bodies have none, so only those are copied.
+    return body.replace("\n", "") if "\n" in body else body
+
+
+def _error(e: Exception) -> Dict[str, Any]:
+    return respond(400, {
+        "message": "There was an issue getting required parameters.",
+        "error": "Type: {}, Error Args: {}".format(str(type(e)), str(e.args))
+    })
+
+
+class Schema:
+    """Declares the JSON body a handler expects. Built once at import; `parse` decodes the body in one pass and
+    either returns the arguments as a dict or the 400 response to return."""
+
+    def __init__(self, **fields):
+        self._fields: Tuple = tuple(
+            (
+                name,
+                spec.types if isinstance(spec, OptionalField) else spec,
+                not isinstance(spec, OptionalField),
+                spec.default if isinstance(spec, OptionalField) else None
+            )
+            for name, spec in fields.items()
+        )
+        self.required = [name for name, _, required, _ in self._fields if required]
+
+    @staticmethod
+    def body(event: Dict[str, Any]) -> Any:
+        body = event.get("body") or ""
+        if event.get("isBase64Encoded"):
+            body = base64.b64decode(body).decode()
+        return json.loads(normalise(body)) if body else {}
+
+    def parse(self, event: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        with phase("parse"):
+            return self._parse(event)
+
+    def _parse(self, event: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        try:
+            arguments = self.body(event)
+        except (ValueError, TypeError) as e:
+            return None, _error(e)
+
+        if not isinstance(arguments, dict):
+            return None, _error(TypeError("The request body must be a JSON object."))
+
+        for name, types, required, default in self._fields:
+            value = arguments.get(name, _MISSING)
+            if value is _MISSING or (value is None and not required):
+                if required:
+                    return None, _error(KeyError(name))
+                arguments[name] = default
+            elif not isinstance(value, types) or isinstance(value, bool) and bool not in _as_tuple(types):
+                return None, _error(TypeError(f"{name} must be of type {_type_names(types)}."))
+
+        return arguments, None
+
+
+def _as_tuple(types) -> Tuple:
+    return types if isinstance(types, tuple) else (types,)
+
+
+def _type_names(types) -> str:
+    return " or ".join(t.__name__ for t in _as_tuple(types))
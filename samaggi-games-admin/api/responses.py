@@ -0,0 +1,54 @@
+import json
+from decimal import Decimal
+from typing import Dict, Any
+
+from instrumentation import phase
+from pagination import gzip_response
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library when the wheel is not packaged
+    orjson = None
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Headers': 'Content-Type,authorisation',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': '*'
+}
+
+
+def _default(o):
+    # Called by both serialisers only for values they cannot encode themselves, i.e. Decimals from DynamoDB.
+    if isinstance(o, Decimal):
+        return float(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_orjson(data: Any) -> str:
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def dumps_stdlib(data: Any) -> str:
+    return json.dumps(data, default=_default)
+
+
+dumps = dumps_orjson if orjson is not None else dumps_stdlib
+
+
+def cors(data: Dict[str, Any]):
+    data["headers"] = dict(CORS_HEADERS)
+    return data
+
+
+def respond(status_code: int, body: Dict[str, Any], event: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Builds the API Gateway proxy response for every handler. Passing the request `event` lets large bodies be
+    gzip-compressed for clients that send Accept: application/gzip."""
+    with phase("serialize"):
+        response = cors({
+            "statusCode": status_code,
+            "body": dumps(body)
+        })
+    if event is not None:
+        with phase("compress"):
+            response = gzip_response(response, event)
+    return response
@@ -0,0 +1,159 @@
+"""Composite roster attributes, so a team or a university's players in one sport is a single index query rather
+than a whole university (or sport) partition filtered in Python.
+
+Values join their parts with "#", e.g. "University of Bristol#Football". Attribute names use "_" instead because
+index names, which follow the `<attribute>-index` convention, may not contain "#".
+
+Handlers go through `Rosters`, which keeps to the original per-university indexes until `migrate_roster_keys` has
+recorded that the composite ones are complete, so the deploy that adds them works before the migration has run.
+"""
+import time
+from typing import Dict, Any, List, Tuple
+
+from aws_clients import dynamodb_client
+from batch_writer import serialize
+from query_cache import QueryCache, QueryResult
+
+SEPARATOR = "#"
+
+TEAM_SPORT = "team_university_sport"  # Players and Teams
+PLAYER_SPORT = "player_university_sport"  # Players
+UNIVERSITY_SPORT = "university_sport"  # Teams
+
+# table -> {composite attribute: the attributes it is built from}
+COMPOSITES = {
+    "SamaggiGamesPlayers": {
+        TEAM_SPORT: ("team_university", "sport"),
+        PLAYER_SPORT: ("player_university", "sport")
+    },
+    "SamaggiGamesTeams": {
+        TEAM_SPORT: ("team_university", "sport"),
+        UNIVERSITY_SPORT: ("university", "sport")
+    }
+}
+
+
+# migrate_roster_keys records here that every composite index is ACTIVE and every row carries its keys. Until then the
+# indexes may be missing or incomplete, so handlers read the original per-university indexes instead.
+MIGRATION_TABLE = "SamaggiGamesMigrations"
+MIGRATION_KEY = "roster-keys"
+# How long a container trusts "not migrated yet" before reading the marker again.
+UNMIGRATED_TTL = 60.0
+
+_migrated = False
+_unmigrated_until = 0.0
+
+
+def composite(*parts: str) -> str:
+    return SEPARATOR.join(parts)
+
+
+def with_keys(table_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """`item` with every composite attribute of its table set from its current fields."""
+    for attribute, parts in COMPOSITES.get(table_name, {}).items():
+        if all(part in item for part in parts):
+            item[attribute] = composite(*(item[part] for part in parts))
+    return item
+
+
+def stale_keys(table_name: str, item: Dict[str, Any]) -> Dict[str, str]:
+    """The composite attributes `item` lacks or has out of date, with the values they should have."""
+    keys = {}
+    for attribute, parts in COMPOSITES.get(table_name, {}).items():
+        if all(part in item for part in parts):
+            value = composite(*(item[part] for part in parts))
+            if item.get(attribute) != value:
+                keys[attribute] = value
+    return keys
+
+
+def key_parts(table_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of `item` its composite attributes are built from."""
+    return {part: item[part] for parts in COMPOSITES.get(table_name, {}).values() for part in parts if part in item}
+
+
+def migration_marker() -> Dict[str, Any]:
+    return {"migration": MIGRATION_KEY}
+
+
+def migrated(client=None) -> bool:
+    """Whether migrate_roster_keys has recorded that the composite indexes are complete. A positive answer is kept
+    for the life of the container and a negative one for UNMIGRATED_TTL seconds, so a container reads the marker at
+    most once a minute and switches over within a minute of the migration finishing."""
+    global _migrated, _unmigrated_until
+    if _migrated or time.monotonic() < _unmigrated_until:
+        return _migrated
+
+    client = client if client is not None else dynamodb_client()
+    try:
+        response = client.get_item(
+            TableName=MIGRATION_TABLE, Key=serialize({"migration": MIGRATION_KEY}), ConsistentRead=True
+        )
+        _migrated = "Item" in response
+    except client.exceptions.ResourceNotFoundException:
+        _migrated = False
+    if not _migrated:
+        _unmigrated_until = time.monotonic() + UNMIGRATED_TTL
+    return _migrated
+
+
+class Rosters:
+    """Reads one university's rows in one sport through a request's QueryCache: from a composite index once the
+    migration is recorded, and from the university's own index filtered on sport until then."""
+
+    def __init__(self, queries: QueryCache, client=None):
+        self._queries = queries
+        self.migrated = migrated(client)
+
+    def _lookup(self, table_name: str, attribute: str, university: str, sport: str) -> Tuple[str, str]:
+        if self.migrated:
+            return attribute, composite(university, sport)
+        return COMPOSITES[table_name][attribute][0], university
+
+    def prefetch(self, table_name: str, attribute: str, university: str, sport: str):
+        self._queries.prefetch(table_name, *self._lookup(table_name, attribute, university, sport))
+
+    def get(self, table_name: str, attribute: str, university: str, sport: str) -> QueryResult:
+        rows = self._queries.get(table_name, *self._lookup(table_name, attribute, university, sport))
+        return rows if self.migrated else rows.filter("sport", sport)
+
+
+def index_name(attribute: str) -> str:
+    return f"{attribute}-index"
+
+
+def ensure_indexes(client, table_name: str) -> List[str]:
+    """Starts creating the first missing composite index on `table_name` and returns the composite indexes that are
+    missing or still being built.
+
+    DynamoDB builds one new index per UpdateTable call and only while the table is ACTIVE, so this is meant to be
+    re-run until it returns an empty list."""
+    table = client.describe_table(TableName=table_name)["Table"]
+    status = {
+        index["IndexName"]: index.get("IndexStatus", "ACTIVE") for index in table.get("GlobalSecondaryIndexes", [])
+    }
+    missing = [attribute for attribute in COMPOSITES.get(table_name, {}) if index_name(attribute) not in status]
+    pending = [attribute for attribute in COMPOSITES.get(table_name, {})
+               if status.get(index_name(attribute), "MISSING") != "ACTIVE"]
+    if not missing or table.get("TableStatus", "ACTIVE") != "ACTIVE" or any(
+            index_status != "ACTIVE" for index_status in status.values()):
+        return pending
+
+    create = {
+        "IndexName": index_name(missing[0]),
+        "KeySchema": [{"AttributeName": missing[0], "KeyType": "HASH"}],
+        "Projection": {"ProjectionType": "ALL"}
+    }
+    if table.get("BillingModeSummary", {}).get("BillingMode") != "PAY_PER_REQUEST":
+        throughput = table["ProvisionedThroughput"]
+        create["ProvisionedThroughput"] = {
+            "ReadCapacityUnits": throughput["ReadCapacityUnits"],
+            "WriteCapacityUnits": throughput["WriteCapacityUnits"]
+        }
+
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[{"AttributeName": missing[0], "AttributeType": "S"}],
+        GlobalSecondaryIndexUpdates=[{"Create": create}]
+    )
+    return pending
@@ -0,0 +1,69 @@
+"""Single entry point for the whole API (deployed when the template's ApiEntryPoint parameter is `router`).
+
+Every API path is served by one function, so one pool of warm containers handles a user's whole registration
+flow instead of each step cold-starting its own function. Events are dispatched by path and method to the same
+handlers in app.py that the separate functions use.
+"""
+from typing import Dict, Any, Tuple
+
+from responses import respond
+
+# path -> (method, handler in app.py). Mirrors the Api events in template.yaml.
+ROUTES: Dict[str, Tuple[str, str]] = {
+    "/check-clash": ("POST", "sport_clash"),
+    "/player-valid": ("POST", "is_player_valid"),
+    "/team-exists": ("POST", "team_exists"),
+    "/data-statistics": ("GET", "data_statistics"),
+    "/add-player": ("POST", "add_player"),
+    "/save-address": ("POST", "save_address"),
+    "/delete-player": ("POST", "delete_player"),
+    "/get-table": ("POST", "get_table"),
+    "/get-table-filtered": ("POST", "get_table_v2"),
+    "/get-sports": ("POST", "get_sports"),
+    "/check-code": ("POST", "check_code"),
+    "/edit-contact": ("POST", "edit_contact"),
+    "/write-spectator": ("POST", "write_spectator"),
+    "/get-payment-code": ("POST", "get_payment_code")
+}
+
+
+def request_route(event: Dict[str, Any]) -> Tuple[str, str]:
+    # `resource` is the template path even when a custom domain adds a base path; `path` is the fallback for
+    # events built by hand.
+    path = event.get("resource") or event.get("path") or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return path, (event.get("httpMethod") or "GET").upper()
+
+
+def resolve(path: str, method: str):
+    """The handler serving `method` on `path`, or the error response to return instead."""
+    if path not in ROUTES:
+        return None, respond(404, {
+            "message": f"No route for {path}.",
+            "error": "Not Found"
+        })
+
+    allowed, handler_name = ROUTES[path]
+    if method == "OPTIONS":  # CORS preflight
+        response = respond(200, {})
+        response["headers"]["Access-Control-Allow-Methods"] = f"{allowed},OPTIONS"
+        return None, response
+    if method != allowed:
+        response = respond(405, {
+            "message": f"{path} only accepts {allowed} requests.",
+            "error": "Method Not Allowed"
+        })
+        response["headers"]["Allow"] = allowed
+        return None, response
+
+    # Imported here so routing errors are answered without loading the handlers' module.
+    import app
+    return getattr(app, handler_name), None
+
+
+def route(event, context):
+    handler, error = resolve(*request_route(event))
+    if error is not None:
+        return error
+    return handler(event, context)
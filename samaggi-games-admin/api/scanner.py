@@ -0,0 +1,135 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Iterator, Optional, Tuple, Callable
+
+from aws_clients import dynamodb_client
+
+# DynamoDB returns at most 1 MB per Scan page, so each segment should cover a few pages.
+SEGMENT_BYTES = 4 * 1024 * 1024
+MAX_SEGMENTS = 16
+
+_deserializer = None
+_END_OF_SEGMENT = object()
+
+
+def deserialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    global _deserializer
+    if _deserializer is None:  # deferred so importing this module does not load boto3
+        from boto3.dynamodb.types import TypeDeserializer
+        _deserializer = TypeDeserializer()
+    return {key: _deserializer.deserialize(value) for key, value in item.items()}
+
+
+def _interleave(producers: List[Callable[[], Iterator[Any]]], max_workers: int) -> Iterator[Any]:
+    """Runs each producer on its own worker and yields what they produce in the order it arrives. Workers stop at
+    their next value once the caller stops iterating."""
+    pending: "queue.Queue" = queue.Queue()
+    cancelled = threading.Event()
+
+    def worker(producer):
+        try:
+            for value in producer():
+                if cancelled.is_set():
+                    break
+                pending.put(value)
+        except Exception as e:
+            pending.put(e)
+        finally:
+            pending.put(_END_OF_SEGMENT)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(producers))) as executor:
+        for producer in producers:
+            executor.submit(worker, producer)
+
+        try:
+            remaining = len(producers)
+            while remaining > 0:
+                value = pending.get()
+                if value is _END_OF_SEGMENT:
+                    remaining -= 1
+                elif isinstance(value, Exception):
+                    raise value
+                else:
+                    yield value
+        finally:
+            cancelled.set()
+
+
+class ParallelScanner:
+    """Scans whole DynamoDB tables, following LastEvaluatedKey and splitting large tables into parallel
+    segments. Uses the low-level client because, unlike resources, it is safe to share between threads."""
+
+    def __init__(self, client=None, max_workers: int = MAX_SEGMENTS):
+        self._client = client if client is not None else dynamodb_client()
+        self._max_workers = max_workers
+
+    def segments_for(self, table_name: str) -> int:
+        # TableSizeBytes is refreshed by DynamoDB roughly every six hours, which is good enough to pick a split.
+        size = self._client.describe_table(TableName=table_name)["Table"].get("TableSizeBytes", 0)
+        return max(1, min(MAX_SEGMENTS, size // SEGMENT_BYTES + 1))
+
+    def segment_pages(self, table_name: str, segment: int = 0, total_segments: int = 1,
+                      **scan_kwargs) -> Iterator[List[Dict[str, Any]]]:
+        kwargs = dict(scan_kwargs, TableName=table_name)
+        if total_segments > 1:
+            kwargs["Segment"] = segment
+            kwargs["TotalSegments"] = total_segments
+
+        while True:
+            page = self._client.scan(**kwargs)
+            yield [deserialize(item) for item in page.get("Items", [])]
+
+            if "LastEvaluatedKey" not in page:
+                return
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+    def page(self, table_name: str, limit: int, exclusive_start_key: Optional[Dict[str, Any]] = None,
+             **scan_kwargs) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Reads a single page of at most `limit` items, returning the wire-format key to resume from."""
+        kwargs = dict(scan_kwargs, TableName=table_name, Limit=limit)
+        if exclusive_start_key:
+            kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        page = self._client.scan(**kwargs)
+        return [deserialize(item) for item in page.get("Items", [])], page.get("LastEvaluatedKey")
+
+    def pages(self, table_name: str, total_segments: Optional[int] = None,
+              **scan_kwargs) -> Iterator[List[Dict[str, Any]]]:
+        """Yields pages as soon as any segment worker receives them, so callers can aggregate while the
+        remaining segments are still being read."""
+        if total_segments is None:
+            total_segments = self.segments_for(table_name)
+
+        if total_segments == 1:
+            yield from self.segment_pages(table_name, **scan_kwargs)
+            return
+
+        yield from _interleave([
+            lambda segment=segment: self.segment_pages(table_name, segment, total_segments, **scan_kwargs)
+            for segment in range(total_segments)
+        ], self._max_workers)
+
+    def items(self, table_name: str, total_segments: Optional[int] = None, **scan_kwargs) -> Iterator[Dict[str, Any]]:
+        for page in self.pages(table_name, total_segments, **scan_kwargs):
+            yield from page
+
+    def all(self, table_name: str, total_segments: Optional[int] = None, **scan_kwargs) -> List[Dict[str, Any]]:
+        items = []
+        for page in self.pages(table_name, total_segments, **scan_kwargs):
+            items.extend(page)
+        return items
+
+    def table_pages(self, *table_names: str) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Scans every table at once, yielding `(table name, page)` as pages arrive so callers can aggregate without
+        holding whole tables."""
+        yield from _interleave([
+            lambda name=name: ((name, page) for page in self.pages(name))
+            for name in table_names
+        ], len(table_names))
+
+    def scan_tables(self, *table_names: str) -> Dict[str, List[Dict[str, Any]]]:
+        tables = {name: [] for name in table_names}
+        for name, page in self.table_pages(*table_names):
+            tables[name].extend(page)
+        return tables
@@ -2,6 +2,8 @@ from typing import Dict, Any, List
 import json
 import csv
 import requests
+from university_registry import universities, simplify_university
+from request_schema import normalise
 
 university_names = [
     "Abertay University",
@@ -212,15 +214,7 @@ def generate_csv():
 
 
 def university_city(university_code: str):
-    with open('universities.csv') as csv_file:
-        csv_reader = csv.reader(csv_file, delimiter=',')
-        for row in csv_reader:
-            if university_code.lower() == row[1]:
-                return row[2]
-
-
-def simplify_university(university_name: str) -> str:
-    return university_name.lower().replace(" ", "").replace(",", "").replace("'", "")
+    return universities.city(university_code)
 
 
 university_names_simplified = [simplify_university(x) for x in university_names]
@@ -237,9 +231,8 @@ class DepArguments:
         return self._arguments is not None
 
     def _get_arguments(self, event: Dict[str, Any]):
-        cleaned_body = event["body"].replace("\n", "")
         try:
-            return json.loads(cleaned_body)
+            return json.loads(normalise(event["body"]))
         except json.decoder.JSONDecodeError as e:
             self.error = "ERROR"
             return None
@@ -0,0 +1,47 @@
+import csv
+import os
+from typing import Dict, Optional, Tuple
+
+UNIVERSITIES_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "universities.csv")
+
+
+def simplify_university(university_name: str) -> str:
+    return university_name.lower().replace(" ", "").replace(",", "").replace("'", "")
+
+
+class UniversityRegistry:
+
+    def __init__(self, csv_path: str = UNIVERSITIES_CSV):
+        # code -> (name, city), built once per container so lookups never touch the disk.
+        self._by_code: Dict[str, Tuple[str, str]] = {}
+
+        with open(csv_path, newline="") as csv_file:
+            csv_reader = csv.DictReader(csv_file, delimiter=",")
+            for row in csv_reader:
+                self._by_code[row["Code"]] = (row["University Name"], row["Associated City"])
+
+    def __contains__(self, code: str) -> bool:
+        return code.lower() in self._by_code
+
+    def __len__(self):
+        return len(self._by_code)
+
+    def name(self, code: str) -> Optional[str]:
+        entry = self._by_code.get(code.lower())
+        return entry[0] if entry is not None else None
+
+    def city(self, code: str) -> Optional[str]:
+        entry = self._by_code.get(code.lower())
+        return entry[1] if entry is not None else None
+
+    def city_for_name(self, university_name: str) -> Optional[str]:
+        return self.city(simplify_university(university_name))
+
+    def names(self):
+        return [name for name, _ in self._by_code.values()]
+
+    def codes(self):
+        return list(self._by_code.keys())
+
+
+universities = UniversityRegistry()
@@ -0,0 +1,106 @@
+"""Measures what a cold start costs each handler: for every `app.*` handler in template.yaml, a fresh interpreter
+imports app.py and serves one sample event against the in-memory backend. Records the import time, the first
+invocation (which builds whatever clients the handler needs) and which heavy dependencies each step loaded.
+
+Usage: python benchmarks/cold_start.py [--repeat 5] [--handler check_code ...] [--output cold-start.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+import sample_events
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCHMARKS_DIR, "..", "api")
+TEMPLATE = os.path.join(BENCHMARKS_DIR, "..", "template.yaml")
+
+HEAVY_MODULES = ["boto3", "botocore", "requests", "DynamoDBInterface", "orjson", "local_dynamodb", "notifier"]
+
+# Runs in the child interpreter: argv[1] is the handler, argv[2] the JSON-encoded event.
+PROBE = """
+import json, sys, time
+heavy = %r
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+after_import = [name for name in heavy if name in sys.modules]
+modules = len(sys.modules)
+handler = getattr(app, sys.argv[1])
+if sys.argv[1] == "disqualify_teams":
+    # Still pays for importing the notifier on first use, but does not post to Discord.
+    import concurrent.futures, notifier
+    def send(self, message, deadline=None):
+        future = concurrent.futures.Future()
+        future.set_result(None)
+        return future
+    notifier.DiscordNotifier.send = send
+handler(json.loads(sys.argv[2]), None)
+invoked = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_invocation_ms": (invoked - imported) * 1000,
+    "modules_after_import": modules,
+    "modules_after_invocation": len(sys.modules),
+    "heavy_after_import": after_import,
+    "heavy_after_invocation": [name for name in heavy if name in sys.modules]
+}))
+""" % HEAVY_MODULES
+
+
+def template_handlers():
+    with open(TEMPLATE) as template:
+        return list(dict.fromkeys(re.findall(r"Handler:\s*app\.(\w+)", template.read())))
+
+
+def probe(handler: str):
+    environment = dict(os.environ, DYNAMODB_BACKEND="memory", METRICS_LOG="off")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, handler, json.dumps(sample_events.event_for(handler))],
+        cwd=API_DIR, env=environment, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per handler; medians are reported")
+    parser.add_argument("--handler", action="append", help="only measure these handlers (repeatable)")
+    parser.add_argument("--output", help="JSON results path")
+    options = parser.parse_args()
+
+    results = {}
+    for handler in options.handler or template_handlers():
+        try:
+            samples = [probe(handler) for _ in range(options.repeat)]
+        except RuntimeError as e:
+            results[handler] = {"error": str(e)}
+            print(f"{handler:<24} skipped: {e}")
+            continue
+
+        results[handler] = {
+            "import_ms": statistics.median(sample["import_ms"] for sample in samples),
+            "first_invocation_ms": statistics.median(sample["first_invocation_ms"] for sample in samples),
+            "modules_after_import": samples[-1]["modules_after_import"],
+            "modules_after_invocation": samples[-1]["modules_after_invocation"],
+            "heavy_after_import": samples[-1]["heavy_after_import"],
+            "heavy_after_invocation": samples[-1]["heavy_after_invocation"]
+        }
+        result = results[handler]
+        print(f"{handler:<24} import {result['import_ms']:7.1f} ms  first call {result['first_invocation_ms']:7.1f} ms  "
+              f"loads {', '.join(result['heavy_after_invocation']) or '-'}")
+
+    if options.output:
+        with open(options.output, "w") as results_file:
+            json.dump({"python": sys.version.split()[0], "repeat": options.repeat, "results": results},
+                      results_file, indent=2)
+        print(f"Results written to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
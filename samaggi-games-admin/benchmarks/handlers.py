@@ -0,0 +1,228 @@
+"""Drives the handlers in app.py against the in-memory backend (local_dynamodb) on a synthetic tournament and records
+latency percentiles, DynamoDB calls per invocation and peak traced memory. Results are written as JSON so runs can be
+compared between commits.
+
+Usage: python benchmarks/handlers.py [--universities 40] [--players 10] [--iterations 50] [--output results.json]
+                                     [--handler add_player --handler get_table ...] [--before-migration]
+
+--before-migration leaves out the roster migration marker, so the roster handlers take the original per-university
+indexes as they do until MigrateRosterKeys has run.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from concurrent.futures import Future
+from typing import Dict, Any, List, Callable
+
+os.environ["DYNAMODB_BACKEND"] = "memory"
+# As deployed with the stream parameters, so ?raw=false reads the stored statistics.
+os.environ["STATISTICS_STREAMS"] = "on"
+os.environ.setdefault("METRICS_LOG", "off")
+
+import tournament  # noqa: E402  (puts api/ on sys.path)
+
+# app.py opens timetable.csv relative to the working directory, as it does in Lambda.
+INVOCATION_DIR = os.getcwd()
+os.chdir(tournament.API_DIR)
+
+import app  # noqa: E402
+import instrumentation  # noqa: E402
+import local_dynamodb  # noqa: E402
+import roster_keys  # noqa: E402
+from presign_cache import PresignedUrlCache  # noqa: E402
+
+
+class NullNotifier:
+    # disqualify_teams reports to Discord; the benchmark measures the handler, not the webhook.
+    def send(self, message: str, deadline: float = None) -> Future:
+        future = Future()
+        future.set_result(None)
+        return future
+
+
+def request(body: Dict[str, Any] = None, query: Dict[str, str] = None) -> Dict[str, Any]:
+    return {
+        "body": json.dumps(body) if body is not None else None,
+        "queryStringParameters": query,
+        "headers": {"Accept": "application/gzip", "Accept-Encoding": "gzip"}
+    }
+
+
+class Scenario:
+    """A handler plus a function producing the event for its i-th invocation."""
+
+    def __init__(self, name: str, handler: Callable, event: Callable[[int], Dict[str, Any]]):
+        self.name = name
+        self.handler = handler
+        self.event = event
+
+
+def scenarios(tables: Dict[str, List[Dict[str, Any]]], players_per_team: int) -> List[Scenario]:
+    sports = [sport["sport_name"] for sport in tables["SamaggiGamesSportCount"]]
+    entered = list(dict.fromkeys(team["team_university"] for team in tables["SamaggiGamesTeams"]))
+    # Universities outside the tournament register new teams; once they run out, rosters join existing teams.
+    newcomers = [name for name in sorted(app.universities.names()) if name not in set(entered)] or entered
+
+    def add_player(i: int) -> Dict[str, Any]:
+        university = newcomers[i % len(newcomers)]
+        return request({
+            "team_university": university,
+            "sport": sports[i % len(sports)],
+            "image": "team.png",
+            "captain_name": "Captain",
+            "captain_contact": "07000000000",
+            "players": [
+                {"name": f"New {i} {n}", "nickname": f"N{n}", "player_university": university}
+                for n in range(players_per_team)
+            ]
+        })
+
+    def is_player_valid(i: int) -> Dict[str, Any]:
+        return request({
+            "team_university": entered[i % len(entered)],
+            "player_university": entered[(i + 1) % len(entered)],
+            "sport": sports[i % len(sports)]
+        })
+
+    return [
+        Scenario("add_player", app.add_player, add_player),
+        Scenario("is_player_valid", app.is_player_valid, is_player_valid),
+        Scenario("data_statistics", app.data_statistics, lambda i: request()),
+        Scenario("data_statistics_stored", app.data_statistics, lambda i: request(query={"raw": "false"})),
+        Scenario("disqualify_teams", app.disqualify_teams, lambda i: request()),
+        Scenario("get_table", app.get_table, lambda i: request({"table_name": "SamaggiGamesPlayers"})),
+        Scenario("get_table_page", app.get_table, lambda i: request({"table_name": "SamaggiGamesPlayers",
+                                                                      "page_size": 100}))
+    ]
+
+
+def fresh_database(tables: Dict[str, List[Dict[str, Any]]]) -> local_dynamodb.LocalDatabase:
+    database = local_dynamodb.install()
+    for name, items in tables.items():
+        database.load(name, items)
+    app.db = database
+    # Each scenario starts with cold presigned URLs and no cached migration state, as a fresh container would.
+    app.image_links = PresignedUrlCache()
+    roster_keys._migrated = False
+    roster_keys._unmigrated_until = 0.0
+    # Build the stored statistics data_statistics serves for ?raw=false, as RebuildStatistics does once deployed.
+    app.rebuild_statistics({}, None)
+    database.reset_counts()
+    return database
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run(scenario: Scenario, tables: Dict[str, List[Dict[str, Any]]], iterations: int, warmup: int) -> Dict[str, Any]:
+    database = fresh_database(tables)
+
+    for i in range(warmup):
+        scenario.handler(scenario.event(i), None)
+
+    # Latency is measured without tracemalloc, which slows allocation-heavy code several times over.
+    database.reset_counts()
+    latencies, status_codes = [], {}
+    with instrumentation.collect() as records:
+        for i in range(warmup, warmup + iterations):
+            event = scenario.event(i)
+            start = time.perf_counter()
+            response = scenario.handler(event, None)
+            latencies.append((time.perf_counter() - start) * 1000)
+            status = str(response.get("statusCode", "n/a")) if isinstance(response, dict) else "n/a"
+            status_codes[status] = status_codes.get(status, 0) + 1
+    operations = dict(database.operations)
+
+    phases = {}
+    for record in records:
+        for name, elapsed in record["phases"].items():
+            phases[name] = phases.get(name, 0.0) + elapsed / iterations
+
+    tracemalloc.start()
+    scenario.handler(scenario.event(warmup + iterations), None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies)
+        },
+        "dynamodb_calls_per_invocation": {
+            operation: count / iterations for operation, count in sorted(operations.items())
+        },
+        "phases_ms": phases,
+        "response_bytes": sum(record["response_bytes"] for record in records) / iterations,
+        "peak_memory_kib": peak / 1024,
+        "status_codes": status_codes
+    }
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--universities", type=int, default=40)
+    parser.add_argument("--players", type=int, default=10, help="players per team")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--handler", action="append", help="only run these scenarios (repeatable)")
+    parser.add_argument("--output", help="JSON results path (default: handlers-<commit>.json)")
+    parser.add_argument("--before-migration", action="store_true",
+                        help="benchmark the roster handlers before MigrateRosterKeys has recorded the migration")
+    options = parser.parse_args()
+    output = os.path.join(INVOCATION_DIR, options.output or f"handlers-{commit()}.json")
+
+    app.discord_notifier = NullNotifier()
+    tables = tournament.generate(options.universities, options.players, options.seed)
+    if options.before_migration:
+        del tables[roster_keys.MIGRATION_TABLE]
+    selected = [s for s in scenarios(tables, options.players) if not options.handler or s.name in options.handler]
+
+    results = {}
+    for scenario in selected:
+        results[scenario.name] = run(scenario, tables, options.iterations, options.warmup)
+        latency = results[scenario.name]["latency_ms"]
+        calls = sum(results[scenario.name]["dynamodb_calls_per_invocation"].values())
+        print(f"{scenario.name:<24} p50 {latency['p50']:8.2f} ms  p99 {latency['p99']:8.2f} ms  "
+              f"{calls:6.1f} calls  {results[scenario.name]['peak_memory_kib']:9.0f} KiB")
+
+    with open(output, "w") as results_file:
+        json.dump({
+            "commit": commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "parameters": {
+                "universities": options.universities,
+                "players_per_team": options.players,
+                "iterations": options.iterations,
+                "warmup": options.warmup,
+                "seed": options.seed,
+                "before_migration": options.before_migration
+            },
+            "tables": {name: len(items) for name, items in tables.items()},
+            "results": results
+        }, results_file, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Serves the API locally for load testing: routes come from template.yaml, each HTTP request becomes an API Gateway
+proxy event, and handlers run on a pool of worker threads against the in-memory backend (local_dynamodb), loaded with
+a synthetic tournament.
+
+Workers share one process so they share the tables, as concurrent Lambda containers share DynamoDB; conditional
+writes and team limits therefore behave as they do in production. Handler code still runs under the GIL, so
+throughput reflects the Python work per request rather than network-bound DynamoDB latency.
+
+Usage: python benchmarks/local_server.py [--port 3000] [--workers 16] [--universities 40] [--players 10]
+                                         [--entry-point functions|router]
+"""
+import argparse
+import base64
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+os.environ["DYNAMODB_BACKEND"] = "memory"
+os.environ.setdefault("METRICS_LOG", "off")
+
+import tournament  # noqa: E402  (puts api/ on sys.path)
+import template_routes  # noqa: E402
+
+os.chdir(tournament.API_DIR)
+
+import app  # noqa: E402
+from responses import CORS_HEADERS  # noqa: E402
+
+API_CODE_URI = "api/"
+
+
+class LambdaContext:
+
+    def __init__(self, function_name: str, timeout: int = 29):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.time() + timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.time()) * 1000))
+
+
+def load_routes(entry_point: str) -> Dict[str, Dict[str, Tuple[str, Any]]]:
+    """path -> {method: (function name, handler)} for every api/ route deployed for `entry_point`."""
+    table = {}
+    for route in template_routes.routes(entry_point=entry_point):
+        if route.code_uri.rstrip("/") + "/" != API_CODE_URI:
+            continue
+        handler = getattr(importlib.import_module(route.module), route.handler_name, None)
+        if handler is None:
+            print(f"Skipping {route.method} {route.path}: {route.handler} does not exist", file=sys.stderr)
+            continue
+        table.setdefault(route.path, {})[route.method] = (route.function, handler)
+    return table
+
+
+def proxy_event(method: str, target: str, headers: Dict[str, str], body: bytes) -> Dict[str, Any]:
+    url = urlsplit(target)
+    query = parse_qs(url.query, keep_blank_values=True)
+    try:
+        text, encoded = body.decode(), False
+    except UnicodeDecodeError:
+        text, encoded = base64.b64encode(body).decode(), True
+
+    return {
+        "resource": url.path,
+        "path": url.path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {key: [value] for key, value in headers.items()},
+        "queryStringParameters": {key: values[-1] for key, values in query.items()} or None,
+        "multiValueQueryStringParameters": query or None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": url.path,
+            "httpMethod": method,
+            "path": url.path,
+            "stage": "local",
+            "requestId": str(uuid.uuid4()),
+            "requestTimeEpoch": int(time.time() * 1000)
+        },
+        "body": text if body else None,
+        "isBase64Encoded": encoded
+    }
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes connection bursts wait out SYN retries, which would show up as latency.
+    request_queue_size = 1024
+
+    def __init__(self, address, routes, workers: int):
+        super().__init__(address, ApiRequestHandler)
+        self.routes = routes
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lambda")
+        self.served = 0
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # clients hanging up mid-response are expected
+            super().handle_error(request, client_address)
+
+    def count(self):
+        with self._lock:
+            self.served += 1
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # one line per request would dominate a load test
+
+    def _send(self, status: int, headers: Dict[str, str], body: bytes):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: Dict[str, str] = None):
+        self._send(status, dict(CORS_HEADERS, **{"Content-Type": "application/json"}, **(headers or {})),
+                   json.dumps({"message": message}).encode())
+
+    def _dispatch(self):
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        methods = self.server.routes.get(path)
+        if methods is None:
+            return self._error(404, "Not Found")
+        if self.command == "OPTIONS":  # API Gateway answers CORS preflights itself
+            return self._send(200, dict(CORS_HEADERS), b"")
+        if self.command not in methods:
+            return self._error(405, "Method Not Allowed", {"Allow": ", ".join(sorted(methods))})
+
+        function, handler = methods[self.command]
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        event = proxy_event(self.command, self.path, dict(self.headers.items()), body)
+        try:
+            response = self.server.pool.submit(handler, event, LambdaContext(function)).result()
+        except Exception as e:  # what API Gateway returns when the function errors
+            print(f"{function} raised {type(e).__name__}: {e}", file=sys.stderr)
+            return self._error(502, "Internal server error")
+        finally:
+            self.server.count()
+
+        if not isinstance(response, dict) or "statusCode" not in response:
+            return self._error(502, "Internal server error")
+        payload = response.get("body") or ""
+        payload = base64.b64decode(payload) if response.get("isBase64Encoded") else payload.encode()
+        self._send(int(response["statusCode"]), response.get("headers") or {}, payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_OPTIONS = _dispatch
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=16, help="handler invocations that may run at once")
+    parser.add_argument("--universities", type=int, default=40, help="0 starts with empty tables")
+    parser.add_argument("--players", type=int, default=10, help="players per team")
+    parser.add_argument("--entry-point", choices=sorted(template_routes.ENTRY_POINT_CONDITIONS), default="functions")
+    options = parser.parse_args()
+
+    if options.universities:
+        for name, items in tournament.generate(options.universities, options.players).items():
+            app.db.load(name, items)
+
+    routes = load_routes(options.entry_point)
+    server = ApiServer((options.host, options.port), routes, options.workers)
+    print(f"Serving {sum(len(methods) for methods in routes.values())} routes on http://{options.host}:{options.port} "
+          f"with {options.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown()
+        print(f"Served {server.served} invocations; DynamoDB operations: {dict(app.db.operations)}")
+
+
+if __name__ == "__main__":
+    main()
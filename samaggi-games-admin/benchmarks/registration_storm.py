@@ -0,0 +1,127 @@
+"""Fires a registration storm at a running local_server: concurrent clients alternate is_player_valid checks with
+add_player registrations for universities entering new sports, then throughput, latency percentiles and status codes
+are reported (and optionally saved as JSON).
+
+Usage: python benchmarks/local_server.py &
+       python benchmarks/registration_storm.py [--url http://127.0.0.1:3000] [--clients 32] [--requests 2000]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+import tournament
+
+
+def post(url: str, body: Dict[str, Any]) -> Tuple[int, float]:
+    request = urllib.request.Request(url, json.dumps(body).encode(), {"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return status, (time.perf_counter() - start) * 1000
+
+
+def storm_requests(count: int, players_per_team: int) -> List[Tuple[str, Dict[str, Any]]]:
+    names = sorted(tournament.universities.names())
+    sports = tournament.sports()
+    storm = []
+    for i in range(count):
+        university, sport = names[(i // 2) % len(names)], sports[(i // 2 // len(names)) % len(sports)]
+        if i % 2 == 0:
+            storm.append(("/player-valid", {
+                "team_university": university,
+                "player_university": names[(i // 2 + 1) % len(names)],
+                "sport": sport
+            }))
+        else:
+            storm.append(("/add-player", {
+                "team_university": university,
+                "sport": sport,
+                "image": "team.png",
+                "captain_name": "Captain",
+                "captain_contact": "07000000000",
+                "players": [
+                    {"name": f"Storm {i} {n}", "nickname": f"S{n}", "player_university": university}
+                    for n in range(players_per_team)
+                ]
+            }))
+    return storm
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:3000")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=5, help="players per add_player registration")
+    parser.add_argument("--output", help="JSON results path")
+    options = parser.parse_args()
+
+    storm = storm_requests(options.requests, options.players)
+    results: Dict[str, List[Tuple[int, float]]] = {}
+    lock = threading.Lock()
+
+    def send(request):
+        path, body = request
+        outcome = post(options.url.rstrip("/") + path, body)
+        with lock:
+            results.setdefault(path, []).append(outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=options.clients) as clients:
+        list(clients.map(send, storm))
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "clients": options.clients,
+        "requests": options.requests,
+        "seconds": elapsed,
+        "throughput_rps": options.requests / elapsed,
+        "routes": {}
+    }
+    for path, outcomes in sorted(results.items()):
+        latencies = [latency for _, latency in outcomes]
+        statuses = {}
+        for status, _ in outcomes:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        summary["routes"][path] = {
+            "requests": len(outcomes),
+            "latency_ms": {
+                "p50": percentile(latencies, 0.50),
+                "p90": percentile(latencies, 0.90),
+                "p99": percentile(latencies, 0.99),
+                "max": max(latencies)
+            },
+            "status_codes": statuses
+        }
+        print(f"{path:<14} {len(outcomes):6d} requests  p50 {percentile(latencies, 0.5):8.2f} ms  "
+              f"p99 {percentile(latencies, 0.99):8.2f} ms  {statuses}")
+    print(f"{options.requests} requests in {elapsed:.2f} s: {summary['throughput_rps']:.1f} requests/s")
+
+    if options.output:
+        with open(options.output, "w") as results_file:
+            json.dump(summary, results_file, indent=2)
+
+    failed = sum(count for route in summary["routes"].values()
+                 for status, count in route["status_codes"].items() if status == "0" or status.startswith("5"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""One representative event per handler in app.py, shaped like the API Gateway proxy (or DynamoDB stream) events
+Lambda delivers. Bodies match the handlers' request schemas; the rows they refer to by id are in `ROWS`, which a run
+loads next to its generated tournament.
+"""
+import json
+from typing import Dict, Any, List
+
+UNIVERSITY = "University of Bristol"
+SUPPORTING_UNIVERSITY = "University of Bath"
+SPORT = "Football"
+PLAYER_UUID = "00000000-0000-4000-8000-000000000000"
+TEAM_UUID = "00000000-0000-4000-8000-000000000001"
+PAYMENT_VERIFICATION = "00000000"
+
+# table -> rows the sample bodies look up, without the composite roster keys.
+ROWS: Dict[str, List[Dict[str, Any]]] = {
+    "SamaggiGamesPlayers": [{
+        "player_uuid": PLAYER_UUID, "name": "Player 0", "sport": SPORT, "team_university": UNIVERSITY,
+        "player_university": UNIVERSITY
+    }],
+    "SamaggiGamesTeams": [{
+        "team_uuid": TEAM_UUID, "sport": SPORT, "team_university": UNIVERSITY, "university": UNIVERSITY,
+        "captain": "Captain", "contact": "07000000000"
+    }],
+    "SamaggiGamesPayment": [{"payment-id": "00000000-0000-4000-8000-000000000002",
+                             "payment-verification": PAYMENT_VERIFICATION}]
+}
+
+BODIES: Dict[str, Dict[str, Any]] = {
+    "sport_clash": {"sport": SPORT, "name": "Player 0", "player_university": UNIVERSITY},
+    "is_player_valid": {"team_university": UNIVERSITY, "player_university": SUPPORTING_UNIVERSITY, "sport": SPORT},
+    "team_exists": {"player_university": UNIVERSITY, "sport": SPORT},
+    "add_player": {
+        "team_university": UNIVERSITY,
+        "sport": SPORT,
+        "image": "team.png",
+        "captain_name": "Captain",
+        "captain_contact": "07000000000",
+        "players": [
+            {"name": "Player 0", "nickname": "P0", "player_university": UNIVERSITY},
+            {"name": "Player 1", "nickname": "P1", "player_university": SUPPORTING_UNIVERSITY}
+        ]
+    },
+    "save_address": {
+        "code": "sample", "addrName": "Samaggi", "addr1": "1 High Street", "addr2": "", "city": "Bristol",
+        "postcode": "BS1 1AA"
+    },
+    "delete_player": {"player_uuid": PLAYER_UUID},
+    "edit_player": {
+        "player_uuid": PLAYER_UUID, "team_university": UNIVERSITY, "sport": SPORT,
+        "name": "Player 0", "player_university": UNIVERSITY
+    },
+    "get_table": {"table_name": "SamaggiGamesPlayers", "page_size": 100},
+    "get_table_v2": {"tableName": "SamaggiGamesPlayers", "filters": [{"key": "sport", "value": SPORT}]},
+    "get_sports": None,
+    "check_code": {"code": "sample"},
+    "edit_contact": {"team_id": TEAM_UUID, "name": "Captain", "contact": "07000000000"},
+    "write_spectator": {"formData": {"name": "Spectator"}, "paymentVerification": PAYMENT_VERIFICATION, "amount": 5},
+    "get_payment_code": None,
+    "data_statistics": None,
+    "disqualify_teams": None
+}
+
+
+def proxy_event(body: Any = None, path: str = "/", method: str = "POST", query: Dict[str, str] = None,
+                headers: Dict[str, str] = None) -> Dict[str, Any]:
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers or {"Content-Type": "application/json"},
+        "queryStringParameters": query,
+        "pathParameters": None,
+        "requestContext": {"resourcePath": path, "httpMethod": method, "path": path},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False
+    }
+
+
+def stream_event() -> Dict[str, Any]:
+    return {
+        "Records": [{
+            "eventID": "00000000000000000000000000000000",
+            "eventName": "INSERT",
+            "eventSourceARN": "arn:aws:dynamodb:eu-west-2:000000000000:table/SamaggiGamesPlayers/stream/sample",
+            "dynamodb": {
+                "Keys": {"player_uuid": {"S": PLAYER_UUID}},
+                "NewImage": {
+                    "player_uuid": {"S": PLAYER_UUID},
+                    "name": {"S": "Player 0"},
+                    "sport": {"S": SPORT},
+                    "team_university": {"S": UNIVERSITY},
+                    "player_university": {"S": UNIVERSITY}
+                }
+            }
+        }]
+    }
+
+
+def event_for(handler: str, path: str = "/", method: str = "POST") -> Dict[str, Any]:
+    if handler == "update_statistics":
+        return stream_event()
+    return proxy_event(BODIES.get(handler), path, method)
@@ -0,0 +1,69 @@
+"""Compares the JSON serialisers available to `responses.respond` on a synthetic players table.
+
+Usage: python benchmarks/serialization.py [--rows 5000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+import responses  # noqa: E402
+
+
+class DecimalEncoder(json.JSONEncoder):
+    # The encoder the handlers used before responses.respond, kept here as the baseline.
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super(DecimalEncoder, self).default(o)
+
+
+def synthetic_table(rows: int):
+    return [
+        {
+            "player_uuid": str(uuid.uuid4()),
+            "sport": "Football",
+            "team_university": "University of Bristol",
+            "name": f"Player {i}",
+            "nickname": f"P{i}",
+            "player_university": "University of Bath",
+            "image": f"{uuid.uuid4()}.png",
+            "player_city": "Bristol",
+            "shirt_number": Decimal(i % 99),
+            "time": Decimal("1700917200.123456"),
+            "amount": Decimal("12.50")
+        }
+        for i in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    body = {"message": "Success", "data": synthetic_table(options.rows)}
+    candidates = {
+        "json + DecimalEncoder": lambda: json.dumps(body, cls=DecimalEncoder),
+        "json + default": lambda: responses.dumps_stdlib(body)
+    }
+    if responses.orjson is not None:
+        candidates["orjson + default"] = lambda: responses.dumps_orjson(body)
+
+    baseline = None
+    for name, serialise in candidates.items():
+        best = min(timeit.repeat(serialise, number=1, repeat=options.repeat))
+        baseline = baseline or best
+        print(f"{name:<24} {best * 1000:8.2f} ms  {baseline / best:5.1f}x")
+
+    print(f"responses.dumps uses {responses.dumps.__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Reads the API routes out of template.yaml.
+
+The template uses CloudFormation tags (`!Ref`, `!GetAtt`, ...) that plain YAML loaders reject, and only a few
+fields are needed, so each resource block is scanned line by line instead of parsed.
+"""
+import os
+import re
+from typing import List, Optional
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.yaml")
+
+# Resources conditional on the ApiEntryPoint parameter, by the entry point that deploys them.
+ENTRY_POINT_CONDITIONS = {
+    "functions": "UseSeparateFunctions",
+    "router": "UseApiRouter"
+}
+
+_RESOURCE = re.compile(r"^  (\w+):\s*$")
+_FIELD = re.compile(r"^\s+(Type|CodeUri|Handler|Condition|Path|Method):\s*(\S+)\s*$")
+
+
+class Route:
+
+    def __init__(self, function: str, path: str, method: str, code_uri: str, handler: str,
+                 condition: Optional[str] = None):
+        self.function = function
+        self.path = path
+        self.method = method.upper()
+        self.code_uri = code_uri
+        self.handler = handler
+        self.condition = condition
+
+    @property
+    def module(self) -> str:
+        return self.handler.rsplit(".", 1)[0]
+
+    @property
+    def handler_name(self) -> str:
+        return self.handler.rsplit(".", 1)[1]
+
+    def __repr__(self):
+        return f"Route({self.method} {self.path} -> {self.code_uri}{self.handler})"
+
+
+def _resources(lines: List[str]):
+    in_resources, name, block = False, None, []
+    for line in lines:
+        if re.match(r"^\S", line):  # a top-level section
+            if name is not None:
+                yield name, block
+            in_resources, name, block = line.startswith("Resources:"), None, []
+            continue
+        if not in_resources:
+            continue
+        match = _RESOURCE.match(line)
+        if match:
+            if name is not None:
+                yield name, block
+            name, block = match.group(1), []
+        elif name is not None:
+            block.append(line)
+    if name is not None:
+        yield name, block
+
+
+def routes(template: str = TEMPLATE, entry_point: str = "functions") -> List[Route]:
+    """Api events of every function deployed for `entry_point` (see the template's ApiEntryPoint parameter)."""
+    with open(template) as template_file:
+        lines = template_file.read().splitlines()
+
+    found = []
+    for name, block in _resources(lines):
+        fields, events = {}, []
+        for line in block:
+            match = _FIELD.match(line)
+            if match is None:
+                continue
+            key, value = match.group(1), match.group(2).strip("\"'")
+            if key == "Path":
+                events.append([value, None])
+            elif key == "Method" and events:
+                events[-1][1] = value
+            elif key not in fields:  # the first Type/Condition belongs to the resource, not its events
+                fields[key] = value
+
+        if fields.get("Type") != "AWS::Serverless::Function" or "Handler" not in fields:
+            continue
+        condition = fields.get("Condition")
+        if condition is not None and condition != ENTRY_POINT_CONDITIONS.get(entry_point):
+            continue
+        found.extend(
+            Route(name, path, method, fields.get("CodeUri", ""), fields["Handler"], condition)
+            for path, method in events if method is not None
+        )
+    return found
@@ -0,0 +1,98 @@
+"""Generates synthetic tournaments shaped like the real tables: every university enters each sport in
+timetable.csv with one team of `players_per_team` players, a quarter of whom come from supporting universities.
+"""
+import csv
+import os
+import random
+import sys
+import uuid
+from decimal import Decimal
+from typing import Dict, Any, List
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, API_DIR)
+
+from roster_keys import with_keys, migration_marker, MIGRATION_TABLE  # noqa: E402
+from university_registry import universities  # noqa: E402
+
+TIMETABLE_CSV = os.path.join(API_DIR, "timetable.csv")
+SUPPORTING_SHARE = 0.25
+
+
+def sports() -> List[str]:
+    with open(TIMETABLE_CSV, newline="") as timetable:
+        return [row[0] for row in csv.reader(timetable) if row]
+
+
+def university_names(count: int) -> List[str]:
+    names = sorted(universities.names())
+    if count > len(names):
+        raise ValueError(f"Only {len(names)} universities are registered, {count} were requested.")
+    return names[:count]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def player(rng: random.Random, team_university: str, player_university: str, sport: str, number: int) -> Dict[str, Any]:
+    return with_keys("SamaggiGamesPlayers", {
+        "player_uuid": _uuid(rng),
+        "sport": sport,
+        "team_university": team_university,
+        "name": f"Player {number} {player_university}",
+        "nickname": f"P{number}",
+        "player_university": player_university,
+        "image": f"{_uuid(rng)}.png",
+        "player_city": universities.city_for_name(player_university),
+        "shirt_number": Decimal(number % 99)
+    })
+
+
+def generate(university_count: int, players_per_team: int, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """Returns table name -> items, deterministic for a given seed."""
+    rng = random.Random(seed)
+    names = university_names(university_count)
+    sport_names = sports()
+
+    tables = {
+        "SamaggiGamesSportCount": [
+            {
+                "sport_name": sport,
+                "team_count": Decimal(university_count),
+                # Leave room for the teams add_player creates while it is benchmarked.
+                "max_teams": Decimal(10 * university_count + 1000),
+                "minimum_size": Decimal(max(1, players_per_team // 2)),
+                "max_size": Decimal(players_per_team * 2)
+            }
+            for sport in sport_names
+        ],
+        "SamaggiGamesTeams": [],
+        "SamaggiGamesPlayers": [],
+        # Every row is written with its composite keys, so the handlers can use the composite indexes.
+        MIGRATION_TABLE: [migration_marker()]
+    }
+
+    supporting = int(players_per_team * SUPPORTING_SHARE) if university_count > 1 else 0
+    for team_university in names:
+        for sport in sport_names:
+            supporters = rng.sample([name for name in names if name != team_university], min(supporting, 2))
+            player_universities = [team_university] * (players_per_team - supporting) + [
+                supporters[i % len(supporters)] for i in range(supporting)
+            ]
+
+            for university in dict.fromkeys(player_universities):
+                tables["SamaggiGamesTeams"].append(with_keys("SamaggiGamesTeams", {
+                    "team_uuid": _uuid(rng),
+                    "sport": sport,
+                    "team_university": team_university,
+                    "university": university,
+                    "captain": f"Captain {team_university}",
+                    "contact": "07000000000"
+                }))
+            tables["SamaggiGamesPlayers"].extend(
+                player(rng, team_university, university, sport, number)
+                for number, university in enumerate(player_universities)
+            )
+
+    return tables
@@ -0,0 +1,9 @@
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The handlers import each other as top-level modules, as they do when Lambda runs them from api/.
+sys.path.insert(0, os.path.join(TESTS_DIR, "..", "api"))
+# The router tests replay the benchmarks' sample events.
+sys.path.append(os.path.join(TESTS_DIR, "..", "benchmarks"))
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("boto3")
+
+from batch_writer import TransactionWriter, TRANSACTION_SIZE, serialize
+from scanner import deserialize
+from local_dynamodb import LocalDatabase, LocalDynamoDBClient, TransactionCanceledException
+
+TABLE = "SamaggiGamesDisqualifications"
+
+
+class ConflictingClient(LocalDynamoDBClient):
+    """Cancels the first `conflicts` transactions as if another writer had touched the same items."""
+
+    def __init__(self, database, conflicts):
+        super().__init__(database)
+        self.conflicts = conflicts
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        if self.conflicts:
+            self.conflicts -= 1
+            raise TransactionCanceledException([{"Code": "TransactionConflict"}] + [{"Code": "None"}] *
+                                               (len(TransactItems) - 1))
+        return super().transact_write_items(TransactItems, **kwargs)
+
+
+def stored(client, key):
+    item = client.get_item(TableName=TABLE, Key={"key": {"S": key}}).get("Item")
+    return deserialize(item) if item is not None else None
+
+
+def test_updates_are_sent_in_transactions_of_at_most_100():
+    client = LocalDynamoDBClient(LocalDatabase())
+    writer = TransactionWriter(client)
+    for i in range(2 * TRANSACTION_SIZE + 50):
+        writer.set(TABLE, {"key": f"team-{i}"}, {"active": True, "time": 1.5})
+
+    assert writer.flush() == {"flushed": 250, "retried": 0, "failed": 0, "requests": 3}
+    assert stored(client, "team-249") == {"key": "team-249", "active": True, "time": Decimal("1.5")}
+
+
+def test_set_keeps_attributes_it_does_not_name():
+    client = LocalDynamoDBClient(LocalDatabase())
+    client.put_item(TableName=TABLE, Item=serialize({"key": "team", "active": True, "disqualified": False}))
+    writer = TransactionWriter(client)
+    writer.set(TABLE, {"key": "team"}, {"disqualified": True})
+    writer.flush()
+
+    assert stored(client, "team") == {"key": "team", "active": True, "disqualified": True}
+
+
+def test_conflicting_transactions_are_retried(monkeypatch):
+    monkeypatch.setattr("batch_writer.BASE_DELAY", 0)
+    client = ConflictingClient(LocalDatabase(), conflicts=2)
+    writer = TransactionWriter(client)
+    writer.set(TABLE, {"key": "a"}, {"active": True})
+    writer.set(TABLE, {"key": "b"}, {"active": True})
+
+    assert writer.flush() == {"flushed": 2, "retried": 4, "failed": 0, "requests": 3}
+    assert stored(client, "b") is not None
+
+
+def test_failed_conditions_are_not_retried():
+    client = LocalDynamoDBClient(LocalDatabase())
+    writer = TransactionWriter(client)
+    writer.set(TABLE, {"key": "a"}, {"active": True}, condition="attribute_exists(#k)", names={"#k": "key"})
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    assert writer.report() == {"flushed": 0, "retried": 0, "failed": 1, "requests": 1}
+    assert stored(client, "a") is None
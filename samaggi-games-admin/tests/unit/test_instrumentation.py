@@ -0,0 +1,92 @@
+import json
+import time
+
+import pytest
+
+import instrumentation
+from instrumentation import instrumented, phase, record_call, collect, parse_line
+
+
+class Context:
+    aws_request_id = "request-1"
+
+
+@pytest.fixture(autouse=True)
+def warm_container(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_cold_start", False)
+    monkeypatch.setattr(instrumentation, "LOG_RECORDS", False)
+
+
+@instrumented
+def sleepy_handler(event, context):
+    with phase("work"):
+        time.sleep(event["sleep"])
+    record_call("dynamodb", "Query", 1.5, {"TableName": "SamaggiGamesPlayers", "CapacityUnits": 0.5})
+    return {"statusCode": 201, "body": json.dumps({"message": "ok"})}
+
+
+@instrumented
+def failing_handler(event, context):
+    raise KeyError("body")
+
+
+def test_records_duration_status_and_calls():
+    with collect() as records:
+        response = sleepy_handler({"sleep": 0.05}, Context())
+
+    assert response["statusCode"] == 201
+    record, = records
+    assert record["handler"] == "sleepy_handler"
+    assert record["request_id"] == "request-1"
+    assert record["status_code"] == 201
+    assert record["error"] is None
+    assert record["duration_ms"] >= 50
+    assert record["phases"]["work"] >= 50
+    assert record["response_bytes"] == len(response["body"])
+    assert record["calls"] == {"dynamodb.Query": {"count": 1, "ms": 1.5}}
+    assert record["consumed_capacity"] == {"SamaggiGamesPlayers": 0.5}
+
+
+def test_only_the_first_invocation_is_a_cold_start(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_cold_start", True)
+    with collect() as records:
+        sleepy_handler({"sleep": 0}, Context())
+        sleepy_handler({"sleep": 0}, Context())
+
+    assert [record["cold_start"] for record in records] == [True, False]
+
+
+def test_error_is_recorded_and_reraised():
+    with collect() as records:
+        with pytest.raises(KeyError):
+            failing_handler({}, None)
+
+    record, = records
+    assert record["handler"] == "failing_handler"
+    assert record["status_code"] is None
+    assert record["error"] == "KeyError"
+    assert record["request_id"] is None
+    assert record["duration_ms"] >= 0
+    assert instrumentation.current() is None
+
+
+def test_nested_handlers_report_one_invocation():
+    @instrumented
+    def outer(event, context):
+        return sleepy_handler(event, context)
+
+    with collect() as records:
+        outer({"sleep": 0}, Context())
+
+    record, = records
+    assert record["handler"] == "outer"
+    assert record["calls"]["dynamodb.Query"]["count"] == 1
+
+
+def test_logged_lines_parse_back(monkeypatch, capsys):
+    monkeypatch.setattr(instrumentation, "LOG_RECORDS", True)
+    sleepy_handler({"sleep": 0}, Context())
+
+    lines = [parse_line(line) for line in capsys.readouterr().out.splitlines()]
+    record, = [line for line in lines if line is not None]
+    assert record["status_code"] == 201
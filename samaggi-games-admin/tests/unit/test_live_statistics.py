@@ -0,0 +1,148 @@
+import random
+import uuid
+
+import pytest
+
+pytest.importorskip("boto3")
+
+from batch_writer import serialize
+from live_statistics import StatisticsAggregate, StatisticsStore, STATISTICS_TABLE, SPORT_COUNT_TABLE
+from local_dynamodb import LocalDatabase, LocalDynamoDBClient
+
+PLAYERS = "SamaggiGamesPlayers"
+TEAMS = "SamaggiGamesTeams"
+KEYS = {PLAYERS: "player_uuid", TEAMS: "team_uuid", SPORT_COUNT_TABLE: "sport_name"}
+UNIVERSITIES = ["University of Bristol", "University of Bath", "Aston University", "University of Leeds"]
+SPORTS = ["Football", "Badminton", "Table Tennis"]
+
+
+class Tables:
+    """Source rows plus the stream records their changes would produce."""
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.rows = {table: {} for table in KEYS}
+        self.sequence = 0
+
+    def record(self, table, event_name, old=None, new=None):
+        self.sequence += 1
+        images = {"Keys": serialize({KEYS[table]: (new or old)[KEYS[table]]})}
+        if old is not None:
+            images["OldImage"] = serialize(old)
+        if new is not None:
+            images["NewImage"] = serialize(new)
+        return {
+            "eventID": "{:032x}".format(self.sequence),
+            "eventName": event_name,
+            "eventSourceARN": f"arn:aws:dynamodb:eu-west-2:000000000000:table/{table}/stream/test",
+            "dynamodb": images
+        }
+
+    def random_row(self, table):
+        if table == PLAYERS:
+            return {"player_uuid": str(uuid.UUID(int=self.rng.getrandbits(128))),
+                    "name": f"Player {self.rng.randrange(40)}", "sport": self.rng.choice(SPORTS),
+                    "team_university": self.rng.choice(UNIVERSITIES)}
+        if table == TEAMS:
+            return {"team_uuid": str(uuid.UUID(int=self.rng.getrandbits(128))), "sport": self.rng.choice(SPORTS),
+                    "team_university": self.rng.choice(UNIVERSITIES), "university": self.rng.choice(UNIVERSITIES)}
+        max_teams = self.rng.randrange(2, 4)
+        return {"sport_name": self.rng.choice(SPORTS), "max_teams": max_teams,
+                "team_count": self.rng.randrange(max_teams + 1)}
+
+    def change(self):
+        """Applies one random insert, modify or remove and returns its stream record."""
+        table = self.rng.choice([PLAYERS, PLAYERS, TEAMS, SPORT_COUNT_TABLE])
+        rows = self.rows[table]
+        action = self.rng.choice(["INSERT", "MODIFY", "REMOVE"]) if rows else "INSERT"
+        new = self.random_row(table)
+
+        if action == "INSERT" or table == SPORT_COUNT_TABLE and new["sport_name"] not in rows:
+            old = rows.get(new[KEYS[table]])
+            rows[new[KEYS[table]]] = new
+            return self.record(table, "MODIFY" if old else "INSERT", old, new)
+
+        old = rows[self.rng.choice(sorted(rows))]
+        if action == "REMOVE":
+            del rows[old[KEYS[table]]]
+            return self.record(table, "REMOVE", old=old)
+
+        new[KEYS[table]] = old[KEYS[table]]
+        rows[new[KEYS[table]]] = new
+        return self.record(table, "MODIFY", old, new)
+
+    def recompute(self):
+        aggregate = StatisticsAggregate()
+        for table, rows in self.rows.items():
+            aggregate.add_rows(table, rows.values())
+        return aggregate
+
+
+def normalised(response):
+    return dict(
+        response,
+        unique_main_universities=sorted(response["unique_main_universities"]),
+        unique_player_universities=sorted(response["unique_player_universities"]),
+        unique_players=sorted(response["unique_players"]),
+        full_teams=sorted((team["sport_name"], team["max_teams"], team["team_count"])
+                          for team in response["full_teams"])
+    )
+
+
+@pytest.fixture
+def store():
+    return StatisticsStore(LocalDynamoDBClient(LocalDatabase()))
+
+
+def test_load_is_none_until_built(store):
+    assert store.load() is None
+    store.rebuild(StatisticsAggregate())
+    assert store.load().to_response()["num_unique_player"] == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replayed_batches_match_a_full_recompute(store, seed):
+    tables = Tables(seed)
+    for _ in range(30):
+        tables.change()
+    store.rebuild(tables.recompute())
+
+    for _ in range(10):
+        batch = [tables.change() for _ in range(tables.rng.randrange(1, 25))]
+        store.apply_records(batch)
+        assert normalised(store.load().to_response()) == normalised(tables.recompute().to_response())
+
+
+def test_retried_batch_is_not_applied_twice(store):
+    tables = Tables()
+    store.rebuild(tables.recompute())
+    batch = [tables.change() for _ in range(20)]
+
+    store.apply_records(batch)
+    store.apply_records(batch)
+
+    assert normalised(store.load().to_response()) == normalised(tables.recompute().to_response())
+
+
+def test_items_stay_small_as_rows_grow():
+    client = LocalDynamoDBClient(LocalDatabase())
+    store = StatisticsStore(client)
+    tables = Tables()
+    batch = [tables.change() for _ in range(500)]
+    store.rebuild(StatisticsAggregate())
+    store.apply_records(batch)
+
+    items = client.scan(TableName=STATISTICS_TABLE)["Items"]
+    assert max(len(repr(item)) for item in items) < 1024
+
+
+def test_rebuild_removes_values_no_row_carries(store):
+    tables = Tables()
+    for _ in range(30):
+        tables.change()
+    store.rebuild(tables.recompute())
+
+    tables.rows[PLAYERS].clear()
+    store.rebuild(tables.recompute())
+
+    assert store.load().to_response()["unique_players"] == []
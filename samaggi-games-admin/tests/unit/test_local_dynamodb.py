@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import pytest
+
+from local_dynamodb import LocalDatabase, LocalDynamoDBClient, TransactionCanceledException, ValidationException, \
+    condition, update
+
+TABLE = "Things"
+
+
+@pytest.fixture
+def client():
+    pytest.importorskip("boto3")
+    return LocalDynamoDBClient(LocalDatabase({TABLE: ("id", ["colour"])}))
+
+
+@pytest.fixture
+def things(client):
+    from batch_writer import serialize
+    for i in range(25):
+        client.put_item(TableName=TABLE, Item=serialize({"id": f"{i:02}", "colour": ["red", "blue"][i % 2], "n": i}))
+    return client
+
+
+def ids(response):
+    from scanner import deserialize
+    return [deserialize(item)["id"] for item in response["Items"]]
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("#n = :five", True),
+    ("#n <> :five", False),
+    ("#n < :five OR colour = :red", False),
+    ("#n >= :five AND NOT (colour = :red)", True),
+    ("attribute_exists(colour) AND attribute_not_exists(size)", True),
+    ("begins_with(colour, :bl)", True),
+    ("size = :five", False),
+    ("size <> :five", True),
+    ("colour < :five", False),
+])
+def test_condition(expression, expected):
+    item = {"id": "a", "colour": "blue", "n": Decimal(5)}
+    evaluate = condition(expression, {"#n": "n"}, {":five": Decimal(5), ":red": "red", ":bl": "bl"})
+
+    assert evaluate(item) is expected
+
+
+def test_condition_rejects_trailing_tokens():
+    with pytest.raises(ValidationException):
+        condition("colour = :red colour", values={":red": "red"})
+
+
+def test_update_applies_set_and_add_in_either_order():
+    item = {"id": "a", "n": Decimal(5)}
+    names, values = {"#c": "count"}, {":one": Decimal(1), ":red": "red"}
+
+    assert update("SET colour = :red, n = n + :one ADD #c :one", names, values)(item) == \
+        {"id": "a", "colour": "red", "n": Decimal(6), "count": Decimal(1)}
+    assert update("ADD n :one SET colour = :red", names, values)(item) == {"id": "a", "colour": "red", "n": Decimal(6)}
+    assert item == {"id": "a", "n": Decimal(5)}
+
+
+def test_update_rejects_missing_attributes_and_other_clauses():
+    with pytest.raises(ValidationException, match="does not exist"):
+        update("SET n = size + :one", values={":one": Decimal(1)})({"id": "a"})
+    with pytest.raises(ValidationException, match="SET and ADD"):
+        update("REMOVE colour")
+
+
+def test_scan_pages_follow_last_evaluated_key(things):
+    pages, kwargs = [], {"TableName": TABLE, "Limit": 10}
+    while True:
+        response = things.scan(**kwargs)
+        pages.append(ids(response))
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sorted(sum(pages, [])) == [f"{i:02}" for i in range(25)]
+
+
+def test_scan_filters_after_the_limit(things):
+    from batch_writer import serialize
+    response = things.scan(TableName=TABLE, Limit=10, FilterExpression="colour = :red",
+                           ExpressionAttributeValues=serialize({":red": "red"}))
+
+    assert response["ScannedCount"] == 10
+    assert response["Count"] == 5
+    assert "LastEvaluatedKey" in response
+
+
+def test_query_reads_a_secondary_index(things):
+    from batch_writer import serialize
+    values = serialize({":blue": "blue"})
+
+    response = things.query(TableName=TABLE, IndexName="colour-index", KeyConditionExpression="colour = :blue",
+                            ExpressionAttributeValues=values)
+
+    assert sorted(ids(response)) == [f"{i:02}" for i in range(1, 25, 2)]
+    assert [index["IndexName"] for index in things.describe_table(TableName=TABLE)["Table"]["GlobalSecondaryIndexes"]] \
+        == ["colour-index"]
+    with pytest.raises(ValidationException):
+        things.query(TableName=TABLE, IndexName="id-index", KeyConditionExpression="colour = :blue",
+                     ExpressionAttributeValues=values)
+
+
+def test_cancelled_transaction_reports_reasons_and_writes_nothing(things):
+    from batch_writer import serialize
+    from scanner import deserialize
+    with pytest.raises(TransactionCanceledException) as cancelled:
+        things.transact_write_items(TransactItems=[
+            {"Put": {"TableName": TABLE, "Item": serialize({"id": "new"})}},
+            {"Update": {
+                "TableName": TABLE,
+                "Key": serialize({"id": "00"}),
+                "UpdateExpression": "SET n = n + :one",
+                "ConditionExpression": "n > :zero",
+                "ExpressionAttributeValues": serialize({":one": 1, ":zero": 0}),
+                "ReturnValuesOnConditionCheckFailure": "ALL_OLD"
+            }}
+        ])
+
+    reasons = cancelled.value.response["CancellationReasons"]
+    assert [reason["Code"] for reason in reasons] == ["None", "ConditionalCheckFailed"]
+    assert deserialize(reasons[1]["Item"]) == {"id": "00", "colour": "red", "n": 0}
+    assert "Item" not in things.get_item(TableName=TABLE, Key=serialize({"id": "new"}))
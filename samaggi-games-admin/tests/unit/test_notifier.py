@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import notifier
+from notifier import DiscordNotifier, MAX_MESSAGE_LENGTH
+
+
+class StubWebhook(ThreadingHTTPServer):
+    """A local stand-in for the Discord webhook: records each posted payload and answers with the next scripted
+    (status, body, delay) reply, then 204 once the script runs out."""
+    daemon_threads = True
+
+    def __init__(self, replies=()):
+        super().__init__(("127.0.0.1", 0), StubWebhookHandler)
+        self.replies = list(replies)
+        self.payloads = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}/webhook".format(self.server_address[1])
+
+    def next_reply(self, payload):
+        with self._lock:
+            self.payloads.append(payload)
+            return self.replies.pop(0) if self.replies else (204, None, 0)
+
+
+class StubWebhookHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status, body, delay = self.server.next_reply(payload)
+        time.sleep(delay)
+        data = json.dumps(body).encode() if body is not None else b""
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except ConnectionError:  # the notifier gave up waiting
+            pass
+
+
+@pytest.fixture
+def webhook():
+    servers = []
+
+    def start(*replies):
+        server = StubWebhook(replies)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(notifier, "BASE_DELAY", 0.01)
+    monkeypatch.setattr(notifier, "MAX_DELAY", 0.05)
+
+
+def test_posts_message_as_content(webhook):
+    server = webhook()
+    discord = DiscordNotifier(server.url)
+
+    discord.send("**Report**\nNo Update to Display").result(timeout=5)
+
+    assert server.payloads == [{"content": "**Report**\nNo Update to Display"}]
+    assert discord.posted == 1
+    assert discord.retried == 0
+
+
+def test_long_messages_are_split_in_order(webhook):
+    server = webhook()
+    lines = ["line {} ".format(i) + "x" * 100 for i in range(40)]
+
+    DiscordNotifier(server.url).send("\n".join(lines)).result(timeout=5)
+
+    assert len(server.payloads) > 1
+    assert all(len(payload["content"]) <= MAX_MESSAGE_LENGTH for payload in server.payloads)
+    assert "\n".join(payload["content"] for payload in server.payloads) == "\n".join(lines)
+
+
+def test_retries_server_errors_and_rate_limits(webhook):
+    server = webhook((500, None, 0), (429, {"retry_after": 0.01}, 0))
+    discord = DiscordNotifier(server.url)
+
+    discord.send("hello").result(timeout=5)
+
+    assert server.payloads == [{"content": "hello"}] * 3
+    assert discord.retried == 2
+    assert discord.posted == 1
+
+
+def test_client_errors_are_not_retried(webhook):
+    server = webhook((400, {"message": "Cannot send an empty message"}, 0))
+
+    with pytest.raises(RuntimeError, match="400"):
+        DiscordNotifier(server.url).send("hello").result(timeout=5)
+
+    assert len(server.payloads) == 1
+
+
+def test_slow_webhook_times_out_and_is_retried(webhook, monkeypatch):
+    monkeypatch.setattr(notifier, "TIMEOUT", 0.2)
+    server = webhook((204, None, 1.0))
+    discord = DiscordNotifier(server.url)
+
+    started = time.perf_counter()
+    discord.send("hello").result(timeout=5)
+
+    assert time.perf_counter() - started < 1.0
+    assert len(server.payloads) == 2
+    assert discord.retried == 1
+
+
+def test_gives_up_after_max_attempts(webhook, monkeypatch):
+    monkeypatch.setattr(notifier, "MAX_ATTEMPTS", 3)
+    server = webhook(*[(503, None, 0)] * 3)
+
+    with pytest.raises(RuntimeError, match="after 3 attempts"):
+        DiscordNotifier(server.url).send("hello").result(timeout=5)
+
+    assert len(server.payloads) == 3
+
+
+def test_retries_stop_at_the_deadline(webhook):
+    server = webhook((429, {"retry_after": 2}, 0))
+
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError, match="Ran out of time"):
+        DiscordNotifier(server.url).send("hello", deadline=time.monotonic() + 1).result(timeout=5)
+
+    assert time.perf_counter() - started < 0.5
+    assert len(server.payloads) == 1
+
+
+def test_request_timeout_is_capped_by_the_deadline(webhook):
+    server = webhook((204, None, 1.0))
+
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError, match="Ran out of time"):
+        DiscordNotifier(server.url).send("hello", deadline=time.monotonic() + 0.2).result(timeout=5)
+
+    assert time.perf_counter() - started < 0.5
+    assert len(server.payloads) == 1
+
+
+def test_expired_deadline_posts_nothing(webhook):
+    server = webhook()
+
+    with pytest.raises(RuntimeError, match="after 0 attempt"):
+        DiscordNotifier(server.url).send("hello", deadline=time.monotonic()).result(timeout=5)
+
+    assert server.payloads == []
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("boto3")
+
+import roster_keys
+from batch_writer import serialize
+from local_dynamodb import LocalDatabase, LocalDynamoDBClient
+from roster_keys import migrated, migration_marker, MIGRATION_TABLE
+
+
+class Clock:
+    """Stands in for the time module in roster_keys."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(roster_keys, "_migrated", False)
+    monkeypatch.setattr(roster_keys, "_unmigrated_until", 0.0)
+    monkeypatch.setattr(roster_keys, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def database():
+    return LocalDatabase()
+
+
+def marker_reads(database):
+    return database.operations["get_item"]
+
+
+def test_unmigrated_is_cached_until_the_ttl_passes(clock, database):
+    client = LocalDynamoDBClient(database)
+
+    assert migrated(client) is False
+    client.put_item(TableName=MIGRATION_TABLE, Item=serialize(migration_marker()))
+    clock.now += roster_keys.UNMIGRATED_TTL - 1
+    assert migrated(client) is False
+    assert marker_reads(database) == 1
+
+    clock.now += 1
+    assert migrated(client) is True
+    assert marker_reads(database) == 2
+
+
+def test_migrated_is_cached_for_good(clock, database):
+    client = LocalDynamoDBClient(database)
+    client.put_item(TableName=MIGRATION_TABLE, Item=serialize(migration_marker()))
+
+    assert migrated(client) is True
+    clock.now += 10 * roster_keys.UNMIGRATED_TTL
+    assert migrated(client) is True
+    assert marker_reads(database) == 1
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+pytest.importorskip("boto3")
+
+import app
+import instrumentation
+import local_dynamodb
+import router
+import sample_events
+import tournament
+from roster_keys import with_keys
+
+# Handlers that answer a valid request with something other than 200, with the message they give. write_spectator
+# saves the spectator and then reports that the form is closed.
+EXPECTED_RESPONSES = {"write_spectator": (400, "Form Closed. Please buy your ticket at the event.")}
+
+ROUTES = sorted(router.ROUTES.items())
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return tournament.generate(len(app.universities), 2)
+
+
+@pytest.fixture(autouse=True)
+def database(tables, monkeypatch):
+    monkeypatch.chdir(tournament.API_DIR)  # handlers open timetable.csv relative to api/
+    monkeypatch.setattr(instrumentation, "LOG_RECORDS", False)
+    database = local_dynamodb.install()
+    for name, items in tables.items():
+        database.load(name, items)
+    for name, rows in sample_events.ROWS.items():
+        database.load(name, [with_keys(name, dict(row)) for row in rows])
+    monkeypatch.setattr(app, "db", database)
+    return database
+
+
+@pytest.mark.parametrize("path, method, handler", [(path, method, handler) for path, (method, handler) in ROUTES])
+def test_route_reaches_its_handler(path, method, handler):
+    with instrumentation.collect() as records:
+        response = router.route(sample_events.event_for(handler, path, method), None)
+
+    assert [record["handler"] for record in records] == [handler]
+    expected, message = EXPECTED_RESPONSES.get(handler, (200, None))
+    assert response["statusCode"] == expected, response["body"][:200]
+    if message is not None:
+        assert json.loads(response["body"])["message"] == message
+
+
+@pytest.mark.parametrize("path, method", [(path, method) for path, (method, _) in ROUTES])
+def test_other_methods_are_not_allowed(path, method):
+    wrong_method = "GET" if method == "POST" else "POST"
+
+    response = router.route(sample_events.proxy_event(None, path, wrong_method), None)
+
+    assert response["statusCode"] == 405
+    assert response["headers"]["Allow"] == method
+
+
+@pytest.mark.parametrize("path, method", [(path, method) for path, (method, _) in ROUTES])
+def test_preflight_is_answered_by_the_router(path, method):
+    with instrumentation.collect() as records:
+        response = router.route(sample_events.proxy_event(None, path, "OPTIONS"), None)
+
+    assert records == []
+    assert response["statusCode"] == 200
+    assert response["headers"]["Access-Control-Allow-Methods"] == f"{method},OPTIONS"
+
+
+def test_unknown_path_is_not_found():
+    response = router.route(sample_events.proxy_event({}, "/no-such-route"), None)
+
+    assert response["statusCode"] == 404
+    assert json.loads(response["body"])["error"] == "Not Found"
+
+
+@pytest.mark.parametrize("body, expected", [
+    ({"tableName": "SamaggiGamesPlayers", "filters": [{"key": "sport", "value": "Football"}], "pageSize": 5}, 200),
+    ({"tableName": "SamaggiGamesPlayers", "filters": [{"value": "Football"}]}, 400),
+    ({"tableName": "SamaggiGamesPlayers", "filters": [], "pageSize": 0}, 400),
+    ({"tableName": "SamaggiGamesPlayers", "filters": [], "nextToken": "not a token"}, 400),
+    ({"tableName": "SamaggiGamesPlayers", "filters": [], "fields": [1]}, 400),
+    ({"tableName": "NoSuchTable", "filters": []}, 404),
+])
+def test_get_table_v2_only_blames_the_request_for_bad_input(body, expected):
+    response = router.route(sample_events.proxy_event(body, "/get-table-filtered"), None)
+
+    assert response["statusCode"] == expected, response["body"][:200]
+
+
+def test_get_table_v2_read_failures_are_server_errors(monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("DynamoDB is unavailable")
+    monkeypatch.setattr(app, "execute", unavailable)
+
+    response = router.route(sample_events.proxy_event({"tableName": "SamaggiGamesPlayers", "filters": []},
+                                                      "/get-table-filtered"), None)
+
+    assert response["statusCode"] == 500